@@ -0,0 +1,82 @@
+"""Benchmark fit/assign time of the seller clustering on synthetic sellers.
+
+Usage:
+    PYTHONPATH=src python scripts/benchmark_clustering.py --n-sellers 1000000 --threads 4
+"""
+
+from __future__ import annotations
+
+# scripts/benchmark_clustering.py
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT / "src"))
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from meli_challenge import clustering
+
+
+def synthetic_seller_table(n: int, seed: int = 0) -> pd.DataFrame:
+    """Seller table with the shape/skew of ``build_seller_table`` output."""
+
+    rng = np.random.default_rng(seed)
+    n_items = rng.geometric(0.3, n)
+    avg_stock = rng.lognormal(2.0, 1.0, n).astype(np.float32)
+    avg_price = rng.lognormal(6.0, 1.2, n).astype(np.float32)
+    return pd.DataFrame(
+        {
+            "n_items": n_items,
+            "total_stock": n_items * avg_stock,
+            "total_value": n_items * avg_stock * avg_price,
+            "avg_stock_per_item": avg_stock,
+            "n_categories": np.minimum(n_items, rng.geometric(0.6, n)),
+            "pct_main_category": rng.uniform(0.3, 1.0, n).astype(np.float32),
+            "pct_new": rng.beta(8, 1, n).astype(np.float32),
+            "pct_used": rng.beta(1, 12, n).astype(np.float32),
+            "avg_price_regular": avg_price,
+            "avg_price_index": rng.lognormal(0.0, 0.4, n).astype(np.float32),
+            "avg_discount_depth": rng.beta(1, 8, n).astype(np.float32),
+            "seller_reputation_score": rng.integers(0, 6, n),
+        }
+    )
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark seller clustering")
+    parser.add_argument("--n-sellers", type=int, default=1_000_000)
+    parser.add_argument("--n-clusters", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=65536)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--umap", action="store_true", help="Add the UMAP projection")
+    args = parser.parse_args(argv)
+
+    df = synthetic_seller_table(args.n_sellers)
+
+    start = time.perf_counter()
+    model = clustering.fit_clusters(
+        df,
+        n_clusters=args.n_clusters,
+        batch_size=args.batch_size,
+        n_threads=args.threads,
+        use_umap=args.umap,
+    )
+    fit_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    labels = model.assign(df, n_threads=args.threads)
+    assign_s = time.perf_counter() - start
+
+    print(f"sellers={args.n_sellers:,} clusters={args.n_clusters} threads={args.threads} umap={args.umap}")
+    print(f"fit:    {fit_s:.2f}s")
+    print(f"assign: {assign_s:.2f}s ({args.n_sellers / assign_s:,.0f} sellers/s)")
+    print("cluster sizes:", np.bincount(labels).tolist())
+
+
+if __name__ == "__main__":
+    main()
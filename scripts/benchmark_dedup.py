@@ -0,0 +1,102 @@
+"""Benchmark near-duplicate title detection (MinHash LSH) on synthetic listings.
+
+Usage:
+    PYTHONPATH=src python scripts/benchmark_dedup.py --n-titles 1000000 2000000
+"""
+
+from __future__ import annotations
+
+# scripts/benchmark_dedup.py
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT / "src"))
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from meli_challenge import dedup
+
+_WORDS = np.array(
+    [
+        "silla", "mesa", "lampara", "celular", "funda", "cargador", "zapatilla",
+        "remera", "pantalon", "mochila", "reloj", "auricular", "bluetooth",
+        "inalambrico", "cuero", "madera", "acero", "negro", "blanco", "rojo",
+        "azul", "grande", "mini", "pro", "max", "original", "nuevo", "oferta",
+        "kit", "set", "x2", "x3", "usb", "led", "hogar", "oficina", "gamer",
+    ]
+)
+
+
+def synthetic_listings(n: int, dup_rate: float = 0.3, seed: int = 0) -> pd.DataFrame:
+    """
+    Listings where ``dup_rate`` of the rows re-publish an earlier product of
+    the same seller with one extra word. ``true_product`` is the planted id.
+    """
+
+    rng = np.random.default_rng(seed)
+    n_sellers = max(1, n // 20)
+    n_products = n - int(n * dup_rate)
+
+    words = _WORDS[rng.integers(0, len(_WORDS), (n_products, 6))]
+    models = rng.integers(100, 99_999, n_products).astype(str)
+    base = pd.Series([" ".join(w) for w in words]) + " modelo " + models
+    product_seller = rng.integers(0, n_sellers, n_products)
+
+    true_product = np.r_[np.arange(n_products), rng.integers(0, n_products, n - n_products)]
+    titles = base.to_numpy()[true_product].astype(object)
+    dup = np.arange(n) >= n_products
+    extra = _WORDS[rng.integers(0, len(_WORDS), dup.sum())]
+    titles[dup] = titles[dup] + " " + extra
+
+    return pd.DataFrame(
+        {
+            "seller_nickname": pd.Series(product_seller[true_product]).map("{:010x}".format),
+            "titulo": titles,
+            "true_product": true_product,
+        }
+    )
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark MinHash LSH title dedup")
+    parser.add_argument("--n-titles", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--dup-rate", type=float, default=0.3)
+    parser.add_argument("--num-perm", type=int, default=64)
+    parser.add_argument("--bands", type=int, default=16)
+    parser.add_argument("--threshold", type=float, default=0.7)
+    args = parser.parse_args(argv)
+
+    config = dedup.MinHashLSHConfig(
+        num_perm=args.num_perm, bands=args.bands, threshold=args.threshold
+    )
+    for n in args.n_titles:
+        df = synthetic_listings(n, args.dup_rate)
+
+        start = time.perf_counter()
+        product_id = dedup.detect_near_duplicates(df, config)
+        elapsed = time.perf_counter() - start
+
+        # Precisión/recall sobre pares (ítem, primer ítem de su producto)
+        found = product_id.to_numpy()
+        truth = df["true_product"].to_numpy()
+        first_truth = pd.Series(np.arange(n)).groupby(truth).transform("min").to_numpy()
+        first_found = pd.Series(np.arange(n)).groupby(found).transform("min").to_numpy()
+        is_dup_truth = first_truth != np.arange(n)
+        recall = (found[is_dup_truth] == found[first_truth[is_dup_truth]]).mean()
+        is_dup_found = first_found != np.arange(n)
+        precision = (truth[is_dup_found] == truth[first_found[is_dup_found]]).mean()
+
+        print(
+            f"titles={n:,} perm={config.num_perm} bands={config.bands}: {elapsed:.2f}s "
+            f"({n / elapsed:,.0f} titles/s) | products {len(np.unique(found)):,} "
+            f"(true {len(np.unique(truth)):,}) | recall {recall:.3f} precision {precision:.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Benchmark the streaming profiler and check chunk-size invariance.
+
+Profiles the same synthetic listings with several chunk sizes and fails if
+the HyperLogLog distinct counts differ between them (the sketches must be
+identical however the rows are chunked).
+
+Usage:
+    PYTHONPATH=src python scripts/benchmark_profiling.py --n-rows 1000000
+"""
+
+from __future__ import annotations
+
+# scripts/benchmark_profiling.py
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT / "src"))
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from meli_challenge import profiling
+
+
+def synthetic_raw(n: int, seed: int = 0) -> pd.DataFrame:
+    """Raw-like listings with skewed category/seller cardinalities and varied title lengths."""
+
+    rng = np.random.default_rng(seed)
+    categories = np.array([f"MLA{i}" for i in rng.integers(1, 10**6, 2_000)], dtype=object)
+    lengths = rng.integers(5, 120, n)
+    titles = pd.Series(rng.integers(0, n // 2, n)).map("titulo {:d} ".format) + pd.Series(
+        lengths
+    ).map(lambda k: "x" * int(k))
+    df = pd.DataFrame(
+        {
+            "seller_nickname": pd.Series(rng.integers(0, n // 20, n)).map("{:010x}".format),
+            "category_id": categories[rng.zipf(1.5, n) % len(categories)],
+            "titulo": titles,
+            "price": rng.lognormal(6.0, 1.2, n),
+            "stock": rng.geometric(0.05, n),
+            "seller_reputation": rng.choice(["green", "yellow", "red", None], n),
+        }
+    )
+    # Orden por largo de título: el peor caso para hashes dependientes del bloque
+    return df.iloc[np.argsort(lengths, kind="stable")].reset_index(drop=True)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the sampled profiler")
+    parser.add_argument("--n-rows", type=int, default=1_000_000)
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=[50_000, 250_000, 1_000_000])
+    parser.add_argument("--threads", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    df = synthetic_raw(args.n_rows)
+    exact = {c: df[c].nunique() for c in profiling.DISTINCT_COLS if c in df.columns}
+
+    counts = {}
+    for chunk_size in args.chunk_sizes:
+        start = time.perf_counter()
+        result = profiling.profile_frame(df, chunk_size=chunk_size, n_workers=args.threads)
+        elapsed = time.perf_counter() - start
+        counts[chunk_size] = result["distinct_counts"].set_index("column")["approx_distinct"]
+        print(f"rows={args.n_rows:,} chunk={chunk_size:,}: {elapsed:.2f}s")
+
+    table = pd.DataFrame(counts)
+    table["exact"] = pd.Series(exact)
+    print(table.to_string())
+
+    if (table[args.chunk_sizes].nunique(axis=1) > 1).any():
+        raise SystemExit("Distinct counts depend on the chunk size.")
+    print("OK: distinct counts are identical across chunk sizes.")
+
+
+if __name__ == "__main__":
+    main()
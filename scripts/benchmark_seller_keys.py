@@ -0,0 +1,85 @@
+"""Benchmark seller-level groupby/merge on string nicknames vs int64 keys.
+
+Usage:
+    PYTHONPATH=src python scripts/benchmark_seller_keys.py --n-items 5000000 --n-sellers 500000
+"""
+
+from __future__ import annotations
+
+# scripts/benchmark_seller_keys.py
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT / "src"))
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from meli_challenge.keys import KEY_COL, SellerKeyEncoder
+
+
+def synthetic_items(n_items: int, n_sellers: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    nicknames = np.array([f"{k:010x}" for k in rng.integers(0, 16**10, n_sellers)], dtype=object)
+    return pd.DataFrame(
+        {
+            "seller_nickname": nicknames[rng.integers(0, n_sellers, n_items)],
+            "stock_norm": rng.random(n_items) * 50,
+            "price": rng.lognormal(5, 1, n_items),
+        }
+    )
+
+
+def chained_aggregation(df: pd.DataFrame, key: str) -> pd.DataFrame:
+    """Same shape of work as `build_seller_table`: several groupbys + merges."""
+
+    g = df.groupby(key)
+    parts = [
+        g.agg(n_items=("price", "count")).reset_index(),
+        g.agg(total_stock=("stock_norm", "sum")).reset_index(),
+        g.agg(avg_price=("price", "mean")).reset_index(),
+        g.agg(median_price=("price", "median")).reset_index(),
+        g.agg(max_stock=("stock_norm", "max")).reset_index(),
+        g.agg(min_price=("price", "min")).reset_index(),
+    ]
+    out = parts[0]
+    for part in parts[1:]:
+        out = out.merge(part, on=key)
+    return out
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark int64 seller keys")
+    parser.add_argument("--n-items", type=int, default=5_000_000)
+    parser.add_argument("--n-sellers", type=int, default=500_000)
+    args = parser.parse_args(argv)
+
+    df = synthetic_items(args.n_items, args.n_sellers)
+
+    encoder = SellerKeyEncoder()
+    keys, encode_s = timed(encoder.fit_transform, df["seller_nickname"])
+    df_keys = df.assign(**{KEY_COL: keys}).drop(columns="seller_nickname")
+
+    _, str_s = timed(chained_aggregation, df, "seller_nickname")
+    table, int_s = timed(chained_aggregation, df_keys, KEY_COL)
+    _, decode_s = timed(encoder.inverse_transform, table[KEY_COL].to_numpy())
+
+    print(f"items={args.n_items:,} sellers={args.n_sellers:,} encoder={encoder.mode}")
+    print(f"string keys: {str_s:.2f}s")
+    print(f"int64 keys:  {int_s:.2f}s  (+ encode {encode_s:.2f}s, decode {decode_s:.2f}s)")
+    print(f"speedup:     {str_s / int_s:.1f}x aggregation, "
+          f"{str_s / (int_s + encode_s + decode_s):.1f}x end to end")
+
+
+if __name__ == "__main__":
+    main()
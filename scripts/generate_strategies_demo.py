@@ -12,24 +12,35 @@ from typing import List, Optional
 ROOT = Path(__file__).resolve().parents[1]
 sys.path.append(str(ROOT / "src"))
 
-from meli_challenge.genai import generate_strategy  
+from meli_challenge.genai import generate_strategy, SemanticStrategyCache, hit_rate_report
+from meli_challenge.genai.strategy_generator import get_local_generator
 
 PROFILE_PATH = ROOT / "data" / "processed" / "seller_profile.csv"
 OUT_PATH = ROOT / "data" / "outputs" / "strategies_sample.csv"
+REUSE_REPORT_PATH = ROOT / "data" / "outputs" / "strategies_reuse_report.csv"
 
 
-def run_strategy_generation() -> None:
+def run_strategy_generation(
+    reuse_threshold: Optional[float] = None,
+    per_segment: int = 1,
+    backend: str = "openai",
+) -> None:
     df = pd.read_csv(PROFILE_PATH)
-    cols = ["seller_nickname", "seller_size", "performance_level"]
-    df = df[cols].copy()
 
     ejemplos = (
         df.query("performance_level in ['Diamante', 'Top performance', 'Low performance']")
           .groupby(['seller_size', 'performance_level'])
-          .head(1)
+          .head(per_segment)
           .reset_index(drop=True)
     )
 
+    if reuse_threshold is not None:
+        run_strategy_generation_with_reuse(ejemplos, reuse_threshold, backend)
+        return
+
+    if backend == "local":
+        run_local_strategy_generation(ejemplos)
+        return
 
     rows = []
     for _, row in ejemplos.iterrows():
@@ -49,6 +60,56 @@ def run_strategy_generation() -> None:
 
     print(f"[OK] Estrategias de ejemplo guardadas en: {OUT_PATH}")
 
+
+def run_local_strategy_generation(ejemplos: pd.DataFrame) -> None:
+    generator = get_local_generator()
+    out_df = ejemplos[["seller_nickname", "seller_size", "performance_level"]].copy()
+    out_df["strategy"] = generator.generate_many(ejemplos)
+
+    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    out_df.to_csv(OUT_PATH, index=False)
+
+    print_local_stats(generator.last_stats)
+    print(f"[OK] Estrategias de ejemplo guardadas en: {OUT_PATH}")
+
+
+def print_local_stats(stats: dict) -> None:
+    if not stats:
+        return
+    print(
+        f"[OK] {stats['n_strategies']} estrategias en {stats['seconds']:.1f}s "
+        f"({stats['strategies_per_second']:.2f} estrategias/s, "
+        f"prefijo compartido de {stats['shared_prefix_tokens']} tokens)"
+    )
+
+
+def run_strategy_generation_with_reuse(
+    ejemplos: pd.DataFrame, threshold: float, backend: str = "openai"
+) -> None:
+    cache = SemanticStrategyCache(threshold=threshold)
+    if backend == "local":
+        # Los sellers no reutilizados se generan en una sola llamada batcheada
+        generator = get_local_generator()
+        report = cache.generate_with_reuse(ejemplos, generate_many_fn=generator.generate_many)
+        print_local_stats(generator.last_stats)
+    else:
+        report = cache.generate_with_reuse(
+            ejemplos, lambda row: generate_strategy(row, backend=backend)
+        )
+
+    cols = ["seller_nickname", "seller_size", "performance_level", "strategy"]
+    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    report.detail[cols].to_csv(OUT_PATH, index=False)
+    hit_rate_report(report).to_csv(REUSE_REPORT_PATH, index=False)
+
+    s = report.summary
+    print(
+        f"[OK] {s['n_sellers']} estrategias: {s['api_calls']} llamadas a la API, "
+        f"{s['reused']} reutilizadas (hit rate {s['hit_rate']:.1%}, umbral {threshold})"
+    )
+    print(f"[OK] Estrategias guardadas en: {OUT_PATH}")
+    print(f"[OK] Reporte de reutilización guardado en: {REUSE_REPORT_PATH}")
+
 def main(argv: Optional[List[str]] = None) -> None:
     parser = argparse.ArgumentParser(description="Run Mercado Libre strategy generation")
     parser.add_argument(
@@ -56,12 +117,47 @@ def main(argv: Optional[List[str]] = None) -> None:
         action="store_true",
         help="Run only the data preparation stage",
     )
+    parser.add_argument(
+        "--reuse-threshold",
+        type=float,
+        default=None,
+        help="Reuse the strategy of a similar seller when cosine similarity >= threshold",
+    )
+    parser.add_argument(
+        "--per-segment",
+        type=int,
+        default=1,
+        help="Number of sellers sampled per (seller_size, performance_level)",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["openai", "local"],
+        default="openai",
+        help="LLM backend: OpenAI API or a local CPU model (transformers)",
+    )
+    parser.add_argument(
+        "--local-model",
+        default=None,
+        help="Hugging Face model id or local path for the local backend",
+    )
+    parser.add_argument("--threads", type=int, default=None, help="CPU threads for the local backend")
+    parser.add_argument("--batch-size", type=int, default=8, help="Max prompts per batch for the local backend")
     args = parser.parse_args(argv)
 
     if not args.strategies:
         parser.error("For now you must pass --strategies to run the strategy generation.")
 
-    run_strategy_generation()
+    if args.backend == "local":
+        local_kwargs = {"num_threads": args.threads, "max_batch_size": args.batch_size}
+        if args.local_model:
+            local_kwargs["model_name"] = args.local_model
+        get_local_generator(**local_kwargs)
+
+    run_strategy_generation(
+        reuse_threshold=args.reuse_threshold,
+        per_segment=args.per_segment,
+        backend=args.backend,
+    )
 
 if __name__ == "__main__":
     main()
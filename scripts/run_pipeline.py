@@ -22,6 +22,9 @@ from pathlib import Path
 from meli_challenge import data_prep
 from meli_challenge import segmentation
 from meli_challenge import performance
+from meli_challenge import clustering
+from meli_challenge import history
+from meli_challenge import profiling
 
 logging.basicConfig(
     level=logging.INFO,
@@ -29,17 +32,45 @@ logging.basicConfig(
 )
 
 
-def run_data_stage() -> None:
+def run_data_stage(
+    outlier_groups: list[str] | None = None,
+    raw_patterns: list[str] | None = None,
+    start_day: str | None = None,
+    end_day: str | None = None,
+    workers: int | None = None,
+    n_clusters: int | None = None,
+    cluster_model: str | None = None,
+    threads: int | None = None,
+    track_history: bool = True,
+    dedup_titles: bool = False,
+    explain: bool = False,
+) -> None:
     """Execute the data preparation stage and report basic stats."""
 
     logging.info("Starting data preparation stage…")
-    df_clean = data_prep.run_full_preparation()
+    df_clean = data_prep.run_full_preparation(
+        group_cols=outlier_groups,
+        raw_patterns=raw_patterns,
+        start_day=start_day,
+        end_day=end_day,
+        max_workers=workers,
+    )
     # logging.info("Finished! Curated dataset shape: %s", df_clean.shape)
-    df_segmented = segmentation.run_full_segmentation()
+    df_segmented = segmentation.run_full_segmentation(dedup_titles=dedup_titles)
     # logging.info("Finished! Segmented dataset shape: %s", df_segmented.shape)
-    df_segmented = performance.add_performance_level(df_segmented)
+    df_segmented = performance.add_performance_level(df_segmented, explain=explain)
     logging.info("Finished! Performance dataset shape: %s", df_segmented.shape)
 
+    if n_clusters:
+        model = clustering.fit_clusters(df_segmented, n_clusters=n_clusters, n_threads=threads)
+        model_path = clustering.save_cluster_model(model)
+        logging.info("Cluster model (k=%s) saved in %s", n_clusters, model_path)
+        df_segmented = clustering.add_cluster(df_segmented, model, n_threads=threads)
+    elif cluster_model:
+        model = clustering.load_cluster_model(cluster_model)
+        df_segmented = clustering.add_cluster(df_segmented, model, n_threads=threads)
+        logging.info("Sellers assigned with existing cluster model %s", cluster_model)
+
     # performance_level_counts = df_segmented["performance_level"].value_counts().reset_index()
     # performance_level_counts.columns = ["performance_level", "count"]
     # performance_level_counts["percentage"] = (performance_level_counts["count"] / performance_level_counts["count"].sum()) * 100
@@ -49,6 +80,31 @@ def run_data_stage() -> None:
     data_prep.save_segmented_dataset(df_segmented, filename="seller_profile.csv") 
     logging.info("Segmented dataset saved in %s", data_prep.PROCESSED_DIR / "seller_profile.csv")
 
+    if track_history:
+        track_segment_migration(df_segmented)
+
+
+def track_segment_migration(df_segmented) -> None:
+    """Store this run in the history and diff it against the previous run."""
+
+    prev_id = history.previous_run_id()
+    run_path = history.record_run(df_segmented)
+    logging.info("Run stored in history: %s", run_path)
+
+    if prev_id is None:
+        logging.info("No previous run found, skipping segment migration diff.")
+        return
+
+    diff = history.diff_runs(history.load_run(prev_id), df_segmented)
+    history.save_diff(diff)
+    logging.info(
+        "Segment migration vs run %s: %s sellers changed segment, %s new, %s dropped",
+        prev_id,
+        len(diff.changed),
+        len(diff.new_sellers),
+        len(diff.dropped_sellers),
+    )
+
 
 def main(argv: list[str] | None = None) -> None:
     parser = argparse.ArgumentParser(description="Run Mercado Libre pipeline")
@@ -57,12 +113,83 @@ def main(argv: list[str] | None = None) -> None:
         action="store_true",
         help="Run only the data preparation stage",
     )
+    parser.add_argument(
+        "--outlier-groups",
+        nargs="+",
+        default=None,
+        metavar="COLUMN",
+        help="Compute price/stock outlier thresholds per group (e.g. category_id)",
+    )
+    parser.add_argument(
+        "--raw-glob",
+        nargs="+",
+        default=None,
+        metavar="PATTERN",
+        help="Read partitioned raw exports (globs or directories under data/raw) in parallel",
+    )
+    parser.add_argument("--start-day", default=None, help="First tim_day to read (YYYY-MM-DD)")
+    parser.add_argument("--end-day", default=None, help="Last tim_day to read (YYYY-MM-DD)")
+    parser.add_argument("--workers", type=int, default=None, help="Parallel file readers")
+    parser.add_argument(
+        "--clusters",
+        type=int,
+        default=None,
+        metavar="K",
+        help="Fit a MiniBatchKMeans with K clusters and add a `cluster` column",
+    )
+    parser.add_argument(
+        "--cluster-model",
+        default=None,
+        help="Assign clusters with a saved model instead of refitting",
+    )
+    parser.add_argument("--threads", type=int, default=None, help="Threads for clustering")
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Write a fast sampled profiling report of the raw and curated data",
+    )
+    parser.add_argument(
+        "--dedup-titles",
+        action="store_true",
+        help="Group near-duplicate listings (MinHash LSH on titulo) before diversification",
+    )
+    parser.add_argument(
+        "--explain",
+        action="store_true",
+        help="Add a `performance_reason` column with the rule behind each performance_level",
+    )
+    parser.add_argument(
+        "--no-history",
+        action="store_true",
+        help="Do not store this run nor diff segments against the previous run",
+    )
     args = parser.parse_args(argv)
 
     if not args.data:
         parser.error("For now you must pass --data to run the pipeline.")
 
-    run_data_stage()
+    run_data_stage(
+        outlier_groups=args.outlier_groups,
+        raw_patterns=args.raw_glob,
+        start_day=args.start_day,
+        end_day=args.end_day,
+        workers=args.workers,
+        n_clusters=args.clusters,
+        cluster_model=args.cluster_model,
+        threads=args.threads,
+        track_history=not args.no_history,
+        dedup_titles=args.dedup_titles,
+        explain=args.explain,
+    )
+
+    if args.profile:
+        report_path = profiling.run_profile_report(
+            n_workers=args.threads,
+            raw_patterns=args.raw_glob,
+            start_day=args.start_day,
+            end_day=args.end_day,
+        )
+        logging.info("Profiling report saved in %s", report_path)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,220 @@
+"""ML clustering of sellers, alongside the rule-based segmentation.
+
+Builds a standardized float32 feature matrix from the ``build_seller_table``
+metrics and fits a ``MiniBatchKMeans`` on streamed minibatches (optionally
+after a UMAP projection). The fitted model is persisted with joblib so new
+sellers can be assigned to the existing clusters without refitting.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.preprocessing import StandardScaler
+from threadpoolctl import threadpool_limits
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+MODELS_DIR = PROJECT_ROOT / "data" / "processed" / "models"
+
+# Métricas numéricas de `build_seller_table` usadas como features
+CLUSTER_FEATURE_COLS = [
+    "n_items",
+    "total_stock",
+    "total_value",
+    "avg_stock_per_item",
+    "n_categories",
+    "pct_main_category",
+    "pct_new",
+    "pct_used",
+    "avg_price_regular",
+    "avg_price_index",
+    "avg_discount_depth",
+    "seller_reputation_score",
+]
+
+# Columnas con cola larga: se comprimen con log1p antes de estandarizar
+LOG_FEATURE_COLS = [
+    "n_items",
+    "total_stock",
+    "total_value",
+    "avg_stock_per_item",
+    "n_categories",
+    "avg_price_regular",
+    "avg_price_index",
+]
+
+
+def build_feature_matrix(df: pd.DataFrame, feature_cols: Sequence[str]) -> np.ndarray:
+    """Raw float32 feature matrix (log1p on heavy-tailed columns, NaN -> 0).
+
+    Shared seller feature builder: also used (then z-scored) by
+    ``genai.semantic_cache`` for strategy reuse.
+    """
+
+    missing = [c for c in feature_cols if c not in df.columns]
+    if missing:
+        raise ValueError(f"Faltan columnas requeridas para clustering: {missing}")
+
+    mat = np.empty((len(df), len(feature_cols)), dtype=np.float32)
+    for j, col in enumerate(feature_cols):
+        values = df[col].to_numpy(dtype=np.float32, na_value=np.nan)
+        if col in LOG_FEATURE_COLS:
+            values = np.log1p(np.clip(values, 0, None))
+        mat[:, j] = np.nan_to_num(values, nan=0.0, posinf=0.0, neginf=0.0)
+    return mat
+
+
+def _iter_batches(n: int, batch_size: int, rng: Optional[np.random.Generator] = None) -> Iterator[np.ndarray]:
+    idx = rng.permutation(n) if rng is not None else np.arange(n)
+    for start in range(0, n, batch_size):
+        yield idx[start : start + batch_size]
+
+
+@dataclass
+class SellerClusterModel:
+    """Fitted scaler (+ optional UMAP) + MiniBatchKMeans, ready to assign."""
+
+    feature_cols: List[str]
+    scaler: StandardScaler
+    kmeans: MiniBatchKMeans
+    reducer: Optional[object] = None
+    batch_size: int = 65536
+    fit_info: dict = field(default_factory=dict)
+
+    def transform(self, mat: np.ndarray) -> np.ndarray:
+        out = self.scaler.transform(mat).astype(np.float32, copy=False)
+        if self.reducer is not None:
+            out = self.reducer.transform(out).astype(np.float32, copy=False)
+        return out
+
+    def assign(self, df: pd.DataFrame, n_threads: Optional[int] = None) -> np.ndarray:
+        """Cluster id for each seller of ``df``, predicted in minibatches."""
+
+        mat = build_feature_matrix(df, self.feature_cols)
+        labels = np.empty(len(mat), dtype=np.int32)
+        with threadpool_limits(limits=n_threads):
+            for idx in _iter_batches(len(mat), self.batch_size):
+                labels[idx] = self.kmeans.predict(self.transform(mat[idx]))
+        return labels
+
+
+def fit_clusters(
+    df: pd.DataFrame,
+    n_clusters: int = 8,
+    feature_cols: Optional[Sequence[str]] = None,
+    batch_size: int = 65536,
+    n_epochs: int = 3,
+    n_threads: Optional[int] = None,
+    use_umap: bool = False,
+    umap_components: int = 5,
+    umap_sample_size: int = 100_000,
+    random_state: int = 42,
+) -> SellerClusterModel:
+    """
+    Fit the seller clustering model on streamed minibatches.
+
+    - The scaler is fitted with ``partial_fit`` batch by batch.
+    - ``MiniBatchKMeans.partial_fit`` runs for ``n_epochs`` over shuffled
+      minibatches, so only one batch is standardized at a time.
+    - With ``use_umap`` a UMAP projection is fitted on a sample of at most
+      ``umap_sample_size`` sellers and applied batch-wise before k-means.
+    - ``n_threads`` caps the BLAS/OpenMP threads used by scikit-learn.
+
+    Features default to the ``CLUSTER_FEATURE_COLS`` present in ``df``.
+    """
+
+    if feature_cols is None:
+        feature_cols = [c for c in CLUSTER_FEATURE_COLS if c in df.columns]
+    feature_cols = list(feature_cols)
+    if not feature_cols:
+        raise ValueError("No hay columnas de features disponibles para clustering.")
+
+    mat = build_feature_matrix(df, feature_cols)
+    n = len(mat)
+    if n < n_clusters:
+        raise ValueError(f"Se requieren al menos {n_clusters} sellers para {n_clusters} clusters.")
+
+    rng = np.random.default_rng(random_state)
+    scaler = StandardScaler()
+    reducer = None
+    kmeans = MiniBatchKMeans(
+        n_clusters=n_clusters,
+        batch_size=batch_size,
+        random_state=random_state,
+        n_init=3,
+    )
+
+    with threadpool_limits(limits=n_threads):
+        for idx in _iter_batches(n, batch_size):
+            scaler.partial_fit(mat[idx])
+
+        if use_umap:
+            import umap
+
+            sample = rng.choice(n, size=min(n, umap_sample_size), replace=False)
+            reducer = umap.UMAP(
+                n_components=umap_components,
+                random_state=random_state,
+                n_jobs=n_threads or -1,
+            )
+            reducer.fit(scaler.transform(mat[sample]).astype(np.float32))
+
+        model = SellerClusterModel(
+            feature_cols=feature_cols,
+            scaler=scaler,
+            kmeans=kmeans,
+            reducer=reducer,
+            batch_size=batch_size,
+        )
+
+        for _ in range(n_epochs):
+            for idx in _iter_batches(n, batch_size, rng):
+                # partial_fit necesita al menos n_clusters filas en el lote
+                if len(idx) >= n_clusters:
+                    kmeans.partial_fit(model.transform(mat[idx]))
+
+    model.fit_info = {"n_sellers": n, "n_epochs": n_epochs, "inertia": float(kmeans.inertia_)}
+    return model
+
+
+def add_cluster(
+    df: pd.DataFrame,
+    model: SellerClusterModel,
+    n_threads: Optional[int] = None,
+    col: str = "cluster",
+) -> pd.DataFrame:
+    """Añade la columna `cluster` usando un modelo ya entrenado."""
+
+    out = df.copy()
+    out[col] = model.assign(out, n_threads=n_threads)
+    return out
+
+
+def save_cluster_model(
+    model: SellerClusterModel, filename: str = "seller_clusters.joblib"
+) -> Path:
+    """Persist the fitted model into ``data/processed/models``."""
+
+    path = Path(filename)
+    if not path.is_absolute():
+        MODELS_DIR.mkdir(parents=True, exist_ok=True)
+        path = MODELS_DIR / filename
+    joblib.dump(model, path)
+    return path
+
+
+def load_cluster_model(filename: str = "seller_clusters.joblib") -> SellerClusterModel:
+    """Load a model saved with ``save_cluster_model``."""
+
+    path = Path(filename)
+    if not path.is_absolute():
+        path = MODELS_DIR / filename
+    if not path.exists():
+        raise FileNotFoundError(f"Cluster model not found at {path}")
+    return joblib.load(path)
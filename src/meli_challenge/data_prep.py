@@ -7,15 +7,38 @@ logic when cleaning the raw CSV.
 
 from __future__ import annotations
 
+import re
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date
 from pathlib import Path
-from typing import Tuple
+from typing import List, Optional, Sequence, Tuple, Union
 
+import numpy as np
 import pandas as pd
 
+from .keys import KEY_COL, NULL_KEY, SellerKeyEncoder, mode_by_key
+
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
 RAW_DATA_DIR = PROJECT_ROOT / "data" / "raw"
 PROCESSED_DIR = PROJECT_ROOT / "data" / "processed"
 
+# Columnas de texto que deben leerse como string en todos los archivos:
+# p.ej. un seller_nickname hex sin letras ("0012345678") no debe inferirse int.
+RAW_SCHEMA = {
+    "tim_day": "object",
+    "seller_nickname": "object",
+    "titulo": "object",
+    "seller_reputation": "object",
+    "logistic_type": "object",
+    "condition": "object",
+    "price": "float64",
+    "regular_price": "float64",
+    "categoria": "object",
+    "url": "object",
+    "category_id": "object",
+    "category_name": "object",
+}
+
 
 def load_raw_dataset(filename: str = "df_challenge_meli.csv") -> pd.DataFrame:
     """Load the raw CSV shipped with the challenge."""
@@ -23,46 +46,331 @@ def load_raw_dataset(filename: str = "df_challenge_meli.csv") -> pd.DataFrame:
     path = RAW_DATA_DIR / filename
     if not path.exists():
         raise FileNotFoundError(f"Raw dataset not found at {path}")
-    return pd.read_csv(path)
+    return pd.read_csv(path, dtype=RAW_SCHEMA)
+
+
+RAW_FILE_SUFFIXES = (".csv", ".parquet")
+
+_HIVE_PART = re.compile(r"^([A-Za-z_][A-Za-z0-9_]*)=(.+)$")
+_DAY_IN_PATH = re.compile(r"(?<!\d)((?:19|20)\d{2})-?(\d{2})-?(\d{2})(?!\d)")
+
+
+def discover_raw_files(
+    patterns: Union[str, Sequence[str]], base_dir: Path = RAW_DATA_DIR
+) -> List[Path]:
+    """Resolve glob patterns and/or partition directories to raw files.
+
+    Relative patterns are resolved under ``base_dir``. A directory is
+    expanded recursively to every CSV/Parquet file it contains.
+    """
+
+    if isinstance(patterns, str):
+        patterns = [patterns]
+
+    files = set()
+    for pattern in patterns:
+        path = Path(pattern)
+        if not path.is_absolute():
+            path = base_dir / path
+        if path.is_dir():
+            candidates = path.rglob("*")
+        elif any(ch in pattern for ch in "*?["):
+            anchor = Path(path.anchor)
+            candidates = anchor.glob(str(path.relative_to(anchor)))
+        else:
+            candidates = [path] if path.exists() else []
+        files.update(p for p in candidates if p.is_file() and p.suffix in RAW_FILE_SUFFIXES)
+
+    if not files:
+        raise FileNotFoundError(f"No raw files match {list(patterns)} under {base_dir}")
+    return sorted(files)
+
+
+def _partition_dirs(path: Path, base_dir: Path) -> Optional[Tuple[str, ...]]:
+    """Directory parts of ``path`` below ``base_dir`` (None if not under it).
+
+    Only this part of the path describes the partition: directories above
+    ``base_dir`` (e.g. ``/mnt/exports_20240101``) say nothing about the file.
+    """
+
+    for root in (base_dir, base_dir.resolve()):
+        try:
+            return path.relative_to(root).parent.parts
+        except ValueError:
+            continue
+    return None
+
+
+def partition_values(path: Path, base_dir: Path = RAW_DATA_DIR) -> dict:
+    """Hive-style ``key=value`` directory parts of ``path`` (e.g. tim_day, site)."""
+
+    values = {}
+    for part in _partition_dirs(path, base_dir) or ():
+        match = _HIVE_PART.match(part)
+        if match:
+            values[match.group(1)] = match.group(2)
+    return values
+
+
+def partition_day(path: Path, base_dir: Path = RAW_DATA_DIR) -> Optional[date]:
+    """``tim_day`` of a partition file, from ``tim_day=...`` or a date in the path.
+
+    The file name is checked first, then its directories below ``base_dir``
+    from the closest up. Files outside ``base_dir`` get None, so they are
+    only filtered row-wise.
+    """
+
+    dirs = _partition_dirs(path, base_dir)
+    if dirs is None:
+        return None
+    hive_day = partition_values(path, base_dir).get("tim_day")
+    texts = ([hive_day] if hive_day else []) + [path.name] + list(reversed(dirs))
+    for text in texts:
+        for match in _DAY_IN_PATH.finditer(text):
+            try:
+                return date(*(int(g) for g in match.groups()))
+            except ValueError:
+                continue
+    return None
+
+
+def prune_partitions(
+    paths: Sequence[Path],
+    start_day: Optional[str] = None,
+    end_day: Optional[str] = None,
+    base_dir: Path = RAW_DATA_DIR,
+) -> List[Path]:
+    """Drop files whose partition day falls outside [start_day, end_day].
+
+    Files without a recognizable day are kept (and filtered row-wise later).
+    """
+
+    start = date.fromisoformat(start_day) if start_day else None
+    end = date.fromisoformat(end_day) if end_day else None
+    kept = []
+    for path in paths:
+        day = partition_day(path, base_dir)
+        if day is not None and ((start and day < start) or (end and day > end)):
+            continue
+        kept.append(path)
+    return kept
+
+
+def read_raw_file(
+    path: Path,
+    start_day: Optional[str] = None,
+    end_day: Optional[str] = None,
+    base_dir: Path = RAW_DATA_DIR,
+) -> pd.DataFrame:
+    """Read one raw file applying ``RAW_SCHEMA`` and the ``tim_day`` range."""
+
+    if path.suffix == ".parquet":
+        df = pd.read_parquet(path)
+    else:
+        df = pd.read_csv(path, dtype=RAW_SCHEMA)
+
+    # Columnas de partición que no vienen dentro del archivo
+    for key, value in partition_values(path, base_dir).items():
+        if key not in df.columns:
+            df[key] = value
+
+    schema = {c: t for c, t in RAW_SCHEMA.items() if c in df.columns}
+    df = df.astype(schema, copy=False)
+
+    if (start_day or end_day) and "tim_day" in df.columns:
+        day = df["tim_day"].str[:10]
+        mask = pd.Series(True, index=df.index)
+        if start_day:
+            mask &= day >= start_day
+        if end_day:
+            mask &= day <= end_day
+        if not mask.all():
+            df = df[mask]
+    return df
 
 
-def clean_price_and_stock(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+def load_raw_partitions(
+    patterns: Union[str, Sequence[str]],
+    start_day: Optional[str] = None,
+    end_day: Optional[str] = None,
+    max_workers: Optional[int] = None,
+    executor: str = "thread",
+    base_dir: Path = RAW_DATA_DIR,
+) -> pd.DataFrame:
+    """Load many raw CSV/Parquet files (e.g. split by day and site) concurrently.
+
+    ``patterns`` are globs (``"tim_day=*/site=*/*.csv"``) or partition
+    directories under ``base_dir``. Files outside the ``tim_day`` range
+    (ISO dates, inclusive) are pruned before reading, each file is read with
+    ``RAW_SCHEMA`` in a thread (default) or process pool, and the results are
+    concatenated once at the end. Raises ``FileNotFoundError`` when no file
+    is left after pruning.
+    """
+
+    if executor not in ("thread", "process"):
+        raise ValueError("executor must be 'thread' or 'process'")
+    if isinstance(patterns, str):
+        patterns = [patterns]
+
+    files = prune_partitions(
+        discover_raw_files(patterns, base_dir), start_day, end_day, base_dir
+    )
+    if not files:
+        raise FileNotFoundError(
+            f"No raw partitions in [{start_day}, {end_day}] for {list(patterns)} under {base_dir}"
+        )
+
+    pool_cls = ThreadPoolExecutor if executor == "thread" else ProcessPoolExecutor
+    with pool_cls(max_workers=max_workers) as pool:
+        frames = list(
+            pool.map(
+                read_raw_file,
+                files,
+                [start_day] * len(files),
+                [end_day] * len(files),
+                [base_dir] * len(files),
+            )
+        )
+
+    return pd.concat(frames, ignore_index=True)
+
+
+def grouped_quantile(
+    values: np.ndarray, codes: np.ndarray, q: float, n_groups: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-group quantile (linear interpolation, same as ``Series.quantile``).
+
+    ``codes`` are dense integer group ids in ``[0, n_groups)``; NaN values must
+    be filtered out beforehand. Values are sorted once globally and their
+    ranks are packed with the group code into a single int64 key
+    (``code * n + rank``); sorting that key places every group in a
+    contiguous, value-sorted block, so each quantile is two gathers at
+    ``start + (count - 1) * q`` instead of one sort per group.
+
+    Returns ``(quantiles, counts)``; groups without rows get NaN.
+    """
+
+    n = len(values)
+    order = np.argsort(values)
+    rank = np.empty(n, dtype=np.int64)
+    rank[order] = np.arange(n, dtype=np.int64)
+    key = np.sort(codes.astype(np.int64) * n + rank)
+    sorted_vals = values[order][key % n] if n else values
+
+    counts = np.bincount(codes, minlength=n_groups)
+    starts = np.cumsum(counts) - counts
+    present = counts > 0
+
+    pos = (counts[present] - 1) * q
+    lo = np.floor(pos).astype(np.int64)
+    hi = np.ceil(pos).astype(np.int64)
+    frac = pos - lo
+    base = starts[present]
+
+    out = np.full(n_groups, np.nan)
+    out[present] = sorted_vals[base + lo] * (1 - frac) + sorted_vals[base + hi] * frac
+    return out, counts
+
+
+def _group_codes(
+    df: pd.DataFrame, group_cols: Optional[Sequence[str]]
+) -> Optional[np.ndarray]:
+    """Dense integer group ids for ``group_cols`` (None when ungrouped)."""
+
+    if not group_cols:
+        return None
+    return df.groupby(list(group_cols), sort=False, dropna=False).ngroup().to_numpy()
+
+
+def _row_thresholds(
+    values: pd.Series,
+    q: float,
+    codes: Optional[np.ndarray],
+    min_group_size: int,
+) -> np.ndarray:
+    """Quantile threshold of ``values`` aligned to each row.
+
+    Without ``codes`` this is the global quantile. Rows in groups with fewer
+    than ``min_group_size`` values fall back to the global quantile, since a
+    p99 over a handful of items is just their maximum.
+    """
+
+    global_q = values.quantile(q)
+    if codes is None:
+        return np.full(len(values), global_q)
+
+    arr = values.to_numpy(dtype="float64")
+    valid = ~np.isnan(arr)
+    n_groups = int(codes.max()) + 1 if len(codes) else 0
+
+    group_q, counts = grouped_quantile(arr[valid], codes[valid], q, n_groups)
+    group_q[counts < min_group_size] = global_q
+    return group_q[codes]
+
+
+def clean_price_and_stock(
+    df: pd.DataFrame,
+    group_cols: Optional[Sequence[str]] = None,
+    min_group_size: int = 30,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
     """Apply the business rules for price/stock cleaning.
 
+    By default the price cut (p99) and stock tail (p95) are global. With
+    ``group_cols`` (e.g. ``["category_id"]``, optionally plus a seller-size
+    column when available) both thresholds are computed per group, so
+    expensive categories are not cut by the cheap ones' p99.
+
     Returns a tuple with (clean_df, outliers_df).
     """
 
+    if group_cols:
+        missing = [c for c in group_cols if c not in df.columns]
+        if missing:
+            raise ValueError(f"Group columns not found in DataFrame: {missing}")
+
     df_price = df.dropna(subset=["price"]).copy()
-    price_p99 = df_price["price"].quantile(0.99)
+    codes = _group_codes(df_price, group_cols)
+    price_p99 = _row_thresholds(df_price["price"], 0.99, codes, min_group_size)
     price_mask = (df_price["price"] > 0) & (df_price["price"] <= price_p99)
 
     outliers = df_price[~price_mask].copy()
     df_clean = df_price[price_mask].copy()
 
     # Stock tail normalization (p95)
-    stock_p95 = df_clean["stock"].quantile(0.95)
-    stock_max = df_clean["stock"].max()
-
-    def normalize_tail(val: float) -> float:
-        if val <= stock_p95:
-            return val
-        return stock_p95 + ((val - stock_p95) / (stock_max - stock_p95)) * stock_p95
+    if codes is not None:
+        codes = codes[price_mask.to_numpy()]
+    stock_p95 = _row_thresholds(df_clean["stock"], 0.95, codes, min_group_size)
+    if codes is not None:
+        stock_max = df_clean["stock"].groupby(codes).transform("max").to_numpy()
+    else:
+        stock_max = df_clean["stock"].max()
 
-    df_clean["stock_norm"] = df_clean["stock"].apply(normalize_tail)
+    stock = df_clean["stock"].to_numpy(dtype="float64")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tail = stock_p95 + ((stock - stock_p95) / (stock_max - stock_p95)) * stock_p95
+    df_clean["stock_norm"] = np.where(stock > stock_p95, tail, stock)
     return df_clean, outliers
 
 
 def impute_seller_reputation(df: pd.DataFrame) -> pd.DataFrame:
-    """Fill seller_reputation nulls using the most common value per nickname."""
+    """Fill seller_reputation nulls using the most common value per nickname.
 
-    rep_map = (
-        df[df["seller_reputation"].notna()]
-        .groupby("seller_nickname")["seller_reputation"]
-        .agg(lambda x: x.mode().iloc[0])
-    )
+    The per-seller mode is computed on the int64 ``seller_key`` (taken from
+    ``df`` when present, otherwise encoded from ``seller_nickname``). Rows
+    without nickname (``NULL_KEY``) get no seller mode, only "unknown".
+    """
 
-    df["seller_reputation"] = df["seller_reputation"].fillna(
-        df["seller_nickname"].map(rep_map)
+    if KEY_COL in df.columns:
+        keys = df[KEY_COL].to_numpy()
+    else:
+        keys = SellerKeyEncoder().fit_transform(df["seller_nickname"])
+
+    reputation = df["seller_reputation"]
+    known = reputation.notna().to_numpy() & (keys != NULL_KEY)
+    rep_map = mode_by_key(keys[known], reputation.to_numpy()[known])
+
+    df["seller_reputation"] = reputation.fillna(
+        pd.Series(keys, index=df.index).map(rep_map)
     )
     df["seller_reputation"] = df["seller_reputation"].fillna("unknown")
     return df
@@ -83,11 +391,26 @@ def save_segmented_dataset(df: pd.DataFrame, filename: str = "df_clustered.csv")
     df.to_csv(PROCESSED_DIR / filename, index=False)
 
 
-def run_full_preparation() -> pd.DataFrame:
-    """Convenience wrapper used by scripts/notebooks."""
+def run_full_preparation(
+    group_cols: Optional[Sequence[str]] = None,
+    raw_patterns: Optional[Sequence[str]] = None,
+    start_day: Optional[str] = None,
+    end_day: Optional[str] = None,
+    max_workers: Optional[int] = None,
+) -> pd.DataFrame:
+    """Convenience wrapper used by scripts/notebooks.
+
+    With ``raw_patterns`` the raw data comes from ``load_raw_partitions``
+    instead of the single challenge CSV.
+    """
 
-    df_raw = load_raw_dataset()
-    df_clean, outliers = clean_price_and_stock(df_raw)
+    if raw_patterns:
+        df_raw = load_raw_partitions(
+            raw_patterns, start_day=start_day, end_day=end_day, max_workers=max_workers
+        )
+    else:
+        df_raw = load_raw_dataset()
+    df_clean, outliers = clean_price_and_stock(df_raw, group_cols=group_cols)
     df_clean = impute_seller_reputation(df_clean)
     save_processed(df_clean, outliers)
     return df_clean
@@ -0,0 +1,247 @@
+"""Near-duplicate listing detection on ``titulo`` with MinHash + LSH.
+
+Sellers often publish the same product several times with slightly
+different titles, which inflates ``n_items`` and the diversification
+metrics. This module groups such listings into products:
+
+1. titles are normalized and cut into character shingles with a rolling
+   hash computed over one concatenated code-point buffer;
+2. each title gets a MinHash signature (multiply-shift hash family,
+   per-title minima via ``np.minimum.reduceat``);
+3. signatures are split into LSH bands; titles sharing a band bucket (and,
+   by default, a seller) become candidate pairs, so there is no all-pairs
+   comparison;
+4. candidates are verified on signature agreement (estimated Jaccard) and
+   connected components give the ``product_id``.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+from .keys import KEY_COL, SellerKeyEncoder
+
+
+@dataclass
+class MinHashLSHConfig:
+    """Parámetros de shingling, MinHash y bandas LSH."""
+
+    shingle_size: int = 4
+    num_perm: int = 64
+    bands: int = 16
+    threshold: float = 0.7  # Jaccard estimado mínimo para considerar duplicado
+    block_size: int = 2_000  # títulos por bloque de firmas (shingles caben en caché)
+    within_seller: bool = True
+    seed: int = 42
+
+    def __post_init__(self) -> None:
+        if self.num_perm % self.bands:
+            raise ValueError("num_perm debe ser múltiplo de bands.")
+
+    @property
+    def rows(self) -> int:
+        return self.num_perm // self.bands
+
+
+def normalize_titles(titles: pd.Series) -> pd.Series:
+    """Minúsculas, sin acentos ni puntuación, espacios colapsados."""
+
+    return (
+        titles.fillna("")
+        .astype(str)
+        .str.lower()
+        .str.normalize("NFKD")
+        .str.encode("ascii", errors="ignore")
+        .str.decode("ascii")
+        .str.replace(r"[^a-z0-9]+", " ", regex=True)
+        .str.strip()
+    )
+
+
+def _shingle_hashes(titles: pd.Series, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    64-bit hashes of every character k-gram, and the title id of each.
+
+    All titles are joined into one UTF-32 buffer (with a separator) and the
+    rolling hash runs over the whole buffer at once; windows that cross a
+    title boundary are discarded. Titles shorter than ``k`` are padded.
+    """
+
+    padded = titles.str.pad(k, side="right")
+    lengths = padded.str.len().to_numpy()
+    buffer = np.frombuffer(("\0".join(padded) + "\0").encode("utf-32-le"), dtype=np.uint32)
+    title_of_pos = np.repeat(np.arange(len(padded)), lengths + 1)
+
+    n_windows = len(buffer) - k + 1
+    h = np.zeros(n_windows, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for j in range(k):
+            h = h * np.uint64(1_000_003) + buffer[j : j + n_windows].astype(np.uint64)
+        h ^= h >> np.uint64(29)
+        h *= np.uint64(0xBF58476D1CE4E5B9)
+        h ^= h >> np.uint64(32)
+
+    valid = title_of_pos[:n_windows] == title_of_pos[k - 1 :]
+    return h[valid], title_of_pos[:n_windows][valid]
+
+
+def minhash_signatures(titles: pd.Series, config: MinHashLSHConfig) -> np.ndarray:
+    """MinHash signatures (n_titles x num_perm, uint32) of normalized titles."""
+
+    # h_i(x) = (a_i * x mod 2^64) >> 32 (multiply-shift). Como el shift es
+    # monótono, min(h_i) = min(a_i * x) >> 32: por permutación basta una
+    # multiplicación in-place y un reduceat.
+    a = np.random.default_rng(config.seed).integers(
+        1, 2**63, config.num_perm, dtype=np.uint64
+    ) | np.uint64(1)
+
+    sig = np.empty((len(titles), config.num_perm), dtype=np.uint32)
+    for start in range(0, len(titles), config.block_size):
+        block = titles.iloc[start : start + config.block_size]
+        shingles, owner = _shingle_hashes(block, config.shingle_size)
+        # Cada título tiene al menos un shingle (padding), y son contiguos
+        starts = np.flatnonzero(np.r_[True, owner[1:] != owner[:-1]])
+        buf = np.empty_like(shingles)
+        out = sig[start : start + len(block)]
+        for i in range(config.num_perm):
+            np.multiply(shingles, a[i], out=buf)
+            out[:, i] = np.minimum.reduceat(buf, starts) >> np.uint64(32)
+    return sig
+
+
+def _candidate_pairs(
+    sig: np.ndarray, config: MinHashLSHConfig, group: Optional[np.ndarray]
+) -> np.ndarray:
+    """Candidate pairs (i, j) that share at least one LSH band bucket."""
+
+    r = config.rows
+    weights = np.random.default_rng(config.seed + 1).integers(
+        1, 2**63, r, dtype=np.uint64
+    ) | np.uint64(1)
+
+    pairs = []
+    with np.errstate(over="ignore"):
+        for band in range(config.bands):
+            cols = sig[:, band * r : (band + 1) * r].astype(np.uint64)
+            key = (cols * weights).sum(axis=1, dtype=np.uint64)
+            if group is not None:
+                key ^= group.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+
+            order = np.argsort(key, kind="stable")
+            sorted_key = key[order]
+            run_start = np.r_[True, sorted_key[1:] != sorted_key[:-1]]
+            leader = order[np.flatnonzero(run_start)[np.cumsum(run_start) - 1]]
+            # Cada miembro del bucket se enlaza con el primero (estrella), no
+            # con todos: los componentes conexos completan la agrupación.
+            member = order != leader
+            pairs.append(np.stack([leader[member], order[member]], axis=1))
+
+    # Pares únicos vía clave empaquetada i * n + j (más rápido que unique(axis=0))
+    n = len(sig)
+    packed = np.unique(np.concatenate(pairs).astype(np.int64) @ np.array([n, 1], dtype=np.int64))
+    return np.stack([packed // n, packed % n], axis=1)
+
+
+def _verify_pairs(
+    sig: np.ndarray, pairs: np.ndarray, threshold: float, chunk: int = 1_000_000
+) -> np.ndarray:
+    keep = np.empty(len(pairs), dtype=bool)
+    for start in range(0, len(pairs), chunk):
+        p = pairs[start : start + chunk]
+        agreement = (sig[p[:, 0]] == sig[p[:, 1]]).mean(axis=1)
+        keep[start : start + chunk] = agreement >= threshold
+    return pairs[keep]
+
+
+def detect_near_duplicates(
+    df: pd.DataFrame,
+    config: Optional[MinHashLSHConfig] = None,
+    title_col: str = "titulo",
+) -> pd.Series:
+    """
+    ``product_id`` per row of ``df``: rows with near-duplicate titles (and,
+    with ``config.within_seller``, the same seller) share the id. Rows whose
+    title normalizes to "" (missing or punctuation only) are never merged and
+    each keep their own id.
+    """
+
+    config = config or MinHashLSHConfig()
+    if title_col not in df.columns:
+        raise ValueError(f"Se requiere la columna '{title_col}'.")
+
+    n = len(df)
+    if n == 0:
+        return pd.Series([], index=df.index, dtype=np.int64, name="product_id")
+
+    group = None
+    if config.within_seller:
+        if KEY_COL in df.columns:
+            group = df[KEY_COL].to_numpy()
+        else:
+            group = SellerKeyEncoder().fit_transform(df["seller_nickname"])
+
+    titles = normalize_titles(df[title_col])
+    sig = minhash_signatures(titles, config)
+    pairs = _verify_pairs(sig, _candidate_pairs(sig, config, group), config.threshold)
+    # Títulos vacíos comparten firma (solo padding): no son evidencia de duplicado
+    empty = (titles == "").to_numpy()
+    if empty.any():
+        pairs = pairs[~(empty[pairs[:, 0]] | empty[pairs[:, 1]])]
+
+    graph = coo_matrix(
+        (np.ones(len(pairs), dtype=np.int8), (pairs[:, 0], pairs[:, 1])), shape=(n, n)
+    )
+    _, labels = connected_components(graph, directed=False)
+    return pd.Series(labels.astype(np.int64), index=df.index, name="product_id")
+
+
+def collapse_listings(df: pd.DataFrame, product_id: pd.Series) -> pd.DataFrame:
+    """
+    Vista colapsada: una fila por producto (la primera publicación), con el
+    número de publicaciones, stock total y rango de precios del grupo.
+    """
+
+    out = df.assign(product_id=product_id.to_numpy())
+    grouped = out.groupby("product_id", sort=False)
+    collapsed = grouped.head(1).set_index("product_id")
+    stats = grouped.agg(n_listings=("product_id", "size"))
+    if "stock" in out.columns:
+        stats["total_stock"] = grouped["stock"].sum()
+    if "price" in out.columns:
+        stats["min_price"] = grouped["price"].min()
+        stats["max_price"] = grouped["price"].max()
+    return collapsed.join(stats).reset_index()
+
+
+def add_unique_products(
+    seller_table: pd.DataFrame,
+    df: pd.DataFrame,
+    product_id: Optional[pd.Series] = None,
+    config: Optional[MinHashLSHConfig] = None,
+) -> pd.DataFrame:
+    """
+    Añade `n_unique_products` (productos distintos tras agrupar
+    near-duplicates) y `duplicate_listing_rate` a la tabla seller.
+    """
+
+    if product_id is None:
+        product_id = detect_near_duplicates(df, config)
+
+    # Sobre seller_key int64 si ambas tablas lo tienen, si no por nickname
+    key = KEY_COL if KEY_COL in df.columns and KEY_COL in seller_table.columns else "seller_nickname"
+    counts = (
+        df.assign(product_id=product_id.to_numpy())
+        .groupby(key)
+        .agg(n_unique_products=("product_id", "nunique"), _n_listings=("product_id", "size"))
+    )
+    counts["duplicate_listing_rate"] = 1 - counts["n_unique_products"] / counts["_n_listings"]
+
+    return seller_table.merge(
+        counts.drop(columns="_n_listings"), left_on=key, right_index=True, how="left"
+    )
@@ -0,0 +1,288 @@
+"""Seller dynamics over the ``tim_day`` snapshots.
+
+The raw feed holds one row per listing and snapshot day. This module sorts
+those rows once by (seller, listing, ``tim_day``) and derives per-seller
+temporal signals with shifted-array diffs over the sorted columns, so no
+Python code runs per seller or per listing.
+
+Sellers are identified by the int64 ``seller_key`` (``keys`` module) when
+the frame has it, and by ``seller_nickname`` otherwise; the output keeps
+the same column.
+"""
+
+from __future__ import annotations
+
+import tempfile
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from .keys import KEY_COL, NULL_KEY
+
+DYNAMICS_COLS = [
+    "days_active",
+    "n_listings",
+    "stock_depletion_per_day",
+    "price_change_rate",
+    "new_listings",
+    "disappeared_listings",
+    "listing_churn_rate",
+]
+
+_INPUT_COLS = ["tim_day", "stock", "price"]
+
+
+def _seller_column(df: pd.DataFrame) -> str:
+    if KEY_COL in df.columns:
+        return KEY_COL
+    if "seller_nickname" in df.columns:
+        return "seller_nickname"
+    raise ValueError(f"Se requiere la columna '{KEY_COL}' o 'seller_nickname'.")
+
+
+def _listing_column(df: pd.DataFrame) -> str:
+    if "url" in df.columns:
+        return "url"
+    if "titulo" in df.columns:
+        return "titulo"
+    raise ValueError("Se requiere la columna 'url' (o 'titulo') para identificar listings.")
+
+
+def _empty_dynamics(seller_col: str = "seller_nickname") -> pd.DataFrame:
+    """Typed empty result (concat-safe, same dtypes as ``_dynamics_kernel``)."""
+
+    dtypes = {
+        "days_active": np.int64,
+        "n_listings": np.int64,
+        "stock_depletion_per_day": np.float64,
+        "price_change_rate": np.float64,
+        "new_listings": np.int64,
+        "disappeared_listings": np.int64,
+        "listing_churn_rate": np.float64,
+    }
+    seller_dtype = np.int64 if seller_col == KEY_COL else object
+    out = pd.DataFrame({seller_col: pd.Series(dtype=seller_dtype)})
+    for col in DYNAMICS_COLS:
+        out[col] = pd.Series(dtype=dtypes[col])
+    return out
+
+
+def _compact(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Keep only the columns needed, with compact dtypes.
+
+    Rows without ``tim_day`` cannot be placed in time and are dropped (a NaT
+    cast to int would otherwise become day 0, 1970-01-01). Rows without a
+    seller (null nickname / ``NULL_KEY``) are dropped too.
+    """
+
+    listing_col = _listing_column(df)
+    seller_col = _seller_column(df)
+    missing = [c for c in _INPUT_COLS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Faltan columnas requeridas para dynamics: {missing}")
+
+    day = pd.to_datetime(df["tim_day"])
+    seller = df[seller_col]
+    keep = day.notna().to_numpy() & seller.notna().to_numpy()
+    if seller_col == KEY_COL:
+        keep &= (seller != NULL_KEY).to_numpy()
+    if not keep.all():
+        df = df[keep]
+        day = day[keep]
+    day = day.to_numpy("datetime64[D]").astype(np.int32)
+    return pd.DataFrame(
+        {
+            seller_col: df[seller_col].to_numpy(),
+            "listing": df[listing_col].to_numpy(),
+            "day": day,
+            "stock": df["stock"].to_numpy(dtype=np.float32),
+            "price": df["price"].to_numpy(dtype=np.float32),
+        }
+    )
+
+
+def _dynamics_kernel(df: pd.DataFrame) -> pd.DataFrame:
+    """Per-seller dynamics for a compact frame (see ``_compact``)."""
+
+    seller_col = _seller_column(df)
+    seller_codes, sellers = pd.factorize(df[seller_col])
+    listing_codes, _ = pd.factorize(df["listing"])
+    n_sellers = len(sellers)
+    if n_sellers == 0:
+        return _empty_dynamics(seller_col)
+
+    day = df["day"].to_numpy()
+    order = np.lexsort((day, listing_codes, seller_codes))
+    seller = seller_codes[order]
+    listing = listing_codes[order]
+    day = day[order]
+    stock = df["stock"].to_numpy()[order]
+    price = df["price"].to_numpy()[order]
+
+    # Pares consecutivos del mismo listing (fila i-1 -> i)
+    same_listing = (seller[1:] == seller[:-1]) & (listing[1:] == listing[:-1])
+    pair_seller = seller[1:][same_listing]
+    d_day = (day[1:] - day[:-1])[same_listing]
+    d_stock = (stock[1:] - stock[:-1])[same_listing]
+    d_price = (price[1:] - price[:-1])[same_listing]
+
+    n_pairs = np.bincount(pair_seller, minlength=n_sellers)
+    span_days = np.bincount(pair_seller, weights=d_day, minlength=n_sellers)
+    depleted = np.bincount(
+        pair_seller, weights=np.nan_to_num(np.clip(-d_stock, 0, None)), minlength=n_sellers
+    )
+    price_changes = np.bincount(
+        pair_seller, weights=(np.nan_to_num(d_price) != 0), minlength=n_sellers
+    )
+
+    # Bloques (seller, listing) y seller: contiguos tras el sort
+    listing_start = np.r_[True, ~same_listing]
+    listing_end = np.r_[~same_listing, True]
+    seller_start_idx = np.flatnonzero(np.r_[True, seller[1:] != seller[:-1]])
+
+    seller_first = np.minimum.reduceat(day, seller_start_idx)
+    seller_last = np.maximum.reduceat(day, seller_start_idx)
+    seller_ids = seller[seller_start_idx]
+    first_day = np.empty(n_sellers, dtype=day.dtype)
+    last_day = np.empty(n_sellers, dtype=day.dtype)
+    first_day[seller_ids] = seller_first
+    last_day[seller_ids] = seller_last
+
+    start_seller = seller[listing_start]
+    end_seller = seller[listing_end]
+    n_listings = np.bincount(start_seller, minlength=n_sellers)
+    new_listings = np.bincount(
+        start_seller, weights=day[listing_start] > first_day[start_seller], minlength=n_sellers
+    )
+    disappeared = np.bincount(
+        end_seller, weights=day[listing_end] < last_day[end_seller], minlength=n_sellers
+    )
+
+    # Días distintos con al menos un listing activo
+    seller_day = np.unique(seller.astype(np.int64) * (1 << 32) + (day - day.min()))
+    days_active = np.bincount(seller_day >> 32, minlength=n_sellers)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = pd.DataFrame(
+            {
+                seller_col: sellers,
+                "days_active": days_active,
+                "n_listings": n_listings,
+                "stock_depletion_per_day": np.where(span_days > 0, depleted / span_days, 0.0),
+                "price_change_rate": np.where(n_pairs > 0, price_changes / n_pairs, 0.0),
+                "new_listings": new_listings.astype(np.int64),
+                "disappeared_listings": disappeared.astype(np.int64),
+                "listing_churn_rate": (new_listings + disappeared) / n_listings,
+            }
+        )
+    return out
+
+
+def _partition_codes(sellers: pd.Series, n_partitions: int) -> np.ndarray:
+    hashes = pd.util.hash_array(sellers.to_numpy())
+    return (hashes % np.uint64(n_partitions)).astype(np.int64)
+
+
+def compute_seller_dynamics(df: pd.DataFrame, n_partitions: int = 1) -> pd.DataFrame:
+    """
+    Per-seller dynamics from item-level snapshots.
+
+    Columns:
+        - days_active: distinct ``tim_day`` with at least one listing
+        - n_listings: distinct listings (``url``)
+        - stock_depletion_per_day: stock units drawn down per day between
+          consecutive snapshots of the same listing (restocks ignored)
+        - price_change_rate: share of consecutive snapshots whose price changed
+        - new_listings / disappeared_listings: listings first seen after the
+          seller's first day / last seen before the seller's last day
+        - listing_churn_rate: (new + disappeared) / n_listings
+
+    ``n_partitions > 1`` splits sellers by hash and processes one partition
+    at a time, bounding the size of the sort buffers.
+    """
+
+    compact = _compact(df)
+    if n_partitions <= 1:
+        return _dynamics_kernel(compact)
+
+    seller_col = _seller_column(compact)
+    part = _partition_codes(compact[seller_col], n_partitions)
+    # Particiones vacías se saltan, como en compute_seller_dynamics_from_chunks
+    results = [
+        _dynamics_kernel(compact[part == p])
+        for p in range(n_partitions)
+        if (part == p).any()
+    ]
+    if not results:
+        return _empty_dynamics(seller_col)
+    return pd.concat(results, ignore_index=True)
+
+
+def compute_seller_dynamics_from_chunks(
+    chunks: Iterable[pd.DataFrame],
+    n_partitions: int = 16,
+    spill_dir: Optional[Path] = None,
+) -> pd.DataFrame:
+    """
+    Memory-bounded variant for histories that do not fit in memory.
+
+    ``chunks`` is any iterable of item-level frames (e.g.
+    ``pd.read_csv(path, chunksize=...)``). Each chunk is reduced to the
+    compact columns and spilled to disk by seller-hash partition; partitions
+    are then processed one at a time, so peak memory is roughly one chunk
+    plus one partition.
+    """
+
+    seller_col = "seller_nickname"
+    with tempfile.TemporaryDirectory(dir=spill_dir) as tmp:
+        tmp_path = Path(tmp)
+        for i, chunk in enumerate(chunks):
+            compact = _compact(chunk)
+            seller_col = _seller_column(compact)
+            part = _partition_codes(compact[seller_col], n_partitions)
+            for p in np.unique(part):
+                compact[part == p].to_pickle(tmp_path / f"part_{p}_{i}.pkl")
+
+        results = []
+        for p in range(n_partitions):
+            files = sorted(tmp_path.glob(f"part_{p}_*.pkl"))
+            if not files:
+                continue
+            frame = pd.concat([pd.read_pickle(f) for f in files], ignore_index=True)
+            results.append(_dynamics_kernel(frame))
+
+    if not results:
+        return _empty_dynamics(seller_col)
+    return pd.concat(results, ignore_index=True)
+
+
+def add_seller_dynamics(
+    seller_table: pd.DataFrame,
+    df: Optional[pd.DataFrame] = None,
+    dynamics: Optional[pd.DataFrame] = None,
+    n_partitions: int = 1,
+) -> pd.DataFrame:
+    """
+    Merge the dynamics columns into the seller table.
+
+    Pass either the item-level ``df`` or precomputed ``dynamics`` (e.g. from
+    ``compute_seller_dynamics_from_chunks``). Sellers without snapshots get 0.
+    The join runs on ``seller_key`` when both tables have it (as
+    ``add_unique_products``), otherwise on ``seller_nickname``.
+    """
+
+    if dynamics is None:
+        if df is None:
+            raise ValueError("Se requiere `df` o `dynamics`.")
+        dynamics = compute_seller_dynamics(df, n_partitions=n_partitions)
+
+    if KEY_COL in dynamics.columns and KEY_COL in seller_table.columns:
+        key = KEY_COL
+    else:
+        key = "seller_nickname"
+    out = seller_table.merge(dynamics, on=key, how="left")
+    out[DYNAMICS_COLS] = out[DYNAMICS_COLS].fillna(0)
+    return out
@@ -1,3 +1,5 @@
 # src/meli_challenge/genai/__init__.py
 
-from .strategy_generator import generate_strategy
\ No newline at end of file
+from .strategy_generator import generate_strategy
+from .semantic_cache import SemanticStrategyCache, hit_rate_report
+from .local_backend import LocalStrategyGenerator
\ No newline at end of file
@@ -0,0 +1,190 @@
+# src/meli_challenge/genai/local_backend.py
+
+from __future__ import annotations
+
+import copy
+import time
+from typing import Dict, List, Optional, Sequence
+
+import pandas as pd
+
+from .prompt_builder import build_messages_for_seller
+
+# Modelo instruct pequeño (~0.5B) que corre razonablemente en CPU.
+# En entornos sin red, `model_name` puede ser una ruta local ya descargada.
+DEFAULT_LOCAL_MODEL = "Qwen/Qwen2.5-0.5B-Instruct"
+
+
+def _common_prefix_len(seqs: Sequence[Sequence[int]]) -> int:
+    """Largo del prefijo de tokens común a todas las secuencias."""
+    if not seqs:
+        return 0
+    first = seqs[0]
+    n = min(len(s) for s in seqs)
+    for s in seqs[1:]:
+        i = 0
+        while i < n and s[i] == first[i]:
+            i += 1
+        n = i
+    return n
+
+
+class LocalStrategyGenerator:
+    """
+    Backend local para `generate_strategy` sobre transformers/torch, en CPU.
+
+    - Batching dinámico: los prompts se ordenan por largo y se agrupan en
+      lotes de hasta `max_batch_size`, minimizando el padding.
+    - Prefijo compartido: el mensaje de sistema y la cabecera fija del prompt
+      (`PROMPT_HEADER`, antes del playbook y de los campos del seller) forman
+      el prefijo de tokens común a todo el trabajo; se procesa una sola vez,
+      su KV-cache se replica en cada lote y solo se procesa el sufijo propio
+      de cada seller. Si todo el trabajo es de un mismo segmento, el
+      playbook también queda en el prefijo.
+    - `num_threads` controla los hilos intra-op de torch.
+
+    El batching y el prefijo sólo aplican dentro de una llamada a
+    `generate_many`: conviene pasarle todos los sellers a generar de una vez
+    (`generate` procesa un único seller, sin batching).
+
+    `last_stats` guarda el throughput (estrategias/segundo) de la última
+    llamada a `generate_many`.
+    """
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_LOCAL_MODEL,
+        num_threads: Optional[int] = None,
+        max_batch_size: int = 8,
+        max_new_tokens: int = 400,
+        temperature: float = 0.4,
+        use_prefix_cache: bool = True,
+    ) -> None:
+        self.model_name = model_name
+        self.num_threads = num_threads
+        self.max_batch_size = max_batch_size
+        self.max_new_tokens = max_new_tokens
+        self.temperature = temperature
+        self.use_prefix_cache = use_prefix_cache
+
+        self.model = None
+        self.tokenizer = None
+        self.last_stats: Dict[str, float] = {}
+
+    def _load(self) -> None:
+        if self.model is not None:
+            return
+
+        import torch
+        from transformers import AutoModelForCausalLM, AutoTokenizer
+
+        if self.num_threads:
+            torch.set_num_threads(self.num_threads)
+
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        if self.tokenizer.pad_token_id is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+
+        self.model = AutoModelForCausalLM.from_pretrained(
+            self.model_name, torch_dtype=torch.float32
+        )
+        self.model.eval()
+
+    def _encode(self, rows: pd.DataFrame) -> List[List[int]]:
+        ids = []
+        for _, row in rows.iterrows():
+            text = self.tokenizer.apply_chat_template(
+                build_messages_for_seller(row),
+                tokenize=False,
+                add_generation_prompt=True,
+            )
+            ids.append(self.tokenizer(text, add_special_tokens=False)["input_ids"])
+        return ids
+
+    def _prefix_cache(self, prefix_ids: List[int]):
+        import torch
+
+        if not prefix_ids:
+            return None
+        with torch.inference_mode():
+            out = self.model(
+                input_ids=torch.tensor([prefix_ids]),
+                use_cache=True,
+            )
+        return out.past_key_values
+
+    def _generate_batch(
+        self, batch: List[List[int]], prefix_len: int, prefix_cache
+    ) -> List[str]:
+        import torch
+
+        pad_id = self.tokenizer.pad_token_id
+        width = max(len(s) for s in batch)
+
+        # Left padding del sufijo: el padding queda entre el prefijo cacheado
+        # y el sufijo, enmascarado vía attention_mask (las posiciones se
+        # derivan de la máscara, por lo que siguen siendo contiguas).
+        input_ids, attention_mask = [], []
+        for seq in batch:
+            n_pad = width - len(seq)
+            prefix, suffix = seq[:prefix_len], seq[prefix_len:]
+            input_ids.append(prefix + [pad_id] * n_pad + suffix)
+            attention_mask.append([1] * prefix_len + [0] * n_pad + [1] * len(suffix))
+
+        kwargs = {}
+        if prefix_cache is not None:
+            cache = copy.deepcopy(prefix_cache)
+            cache.batch_repeat_interleave(len(batch))
+            kwargs["past_key_values"] = cache
+
+        with torch.inference_mode():
+            out = self.model.generate(
+                input_ids=torch.tensor(input_ids),
+                attention_mask=torch.tensor(attention_mask),
+                max_new_tokens=self.max_new_tokens,
+                do_sample=self.temperature > 0,
+                temperature=self.temperature if self.temperature > 0 else None,
+                pad_token_id=pad_id,
+                **kwargs,
+            )
+
+        return self.tokenizer.batch_decode(out[:, width:], skip_special_tokens=True)
+
+    def generate_many(self, rows: pd.DataFrame) -> List[str]:
+        """Genera una estrategia por fila de `rows`, en el mismo orden."""
+        self._load()
+        self.last_stats = {}
+        start = time.perf_counter()
+
+        encoded = self._encode(rows)
+        if not encoded:
+            return []
+
+        # Siempre debe quedar al menos un token propio por secuencia
+        prefix_len = 0
+        if self.use_prefix_cache:
+            prefix_len = min(_common_prefix_len(encoded), min(map(len, encoded)) - 1)
+        prefix_cache = self._prefix_cache(encoded[0][:prefix_len])
+
+        order = sorted(range(len(encoded)), key=lambda i: len(encoded[i]))
+        results: List[Optional[str]] = [None] * len(encoded)
+        for b in range(0, len(order), self.max_batch_size):
+            idx = order[b : b + self.max_batch_size]
+            texts = self._generate_batch(
+                [encoded[i] for i in idx], prefix_len, prefix_cache
+            )
+            for i, text in zip(idx, texts):
+                results[i] = text.strip()
+
+        elapsed = time.perf_counter() - start
+        self.last_stats = {
+            "n_strategies": len(results),
+            "seconds": elapsed,
+            "strategies_per_second": len(results) / elapsed if elapsed else 0.0,
+            "shared_prefix_tokens": prefix_len,
+        }
+        return results
+
+    def generate(self, row: pd.Series) -> str:
+        """Genera la estrategia de un único seller (sin batching; ver `generate_many`)."""
+        return self.generate_many(row.to_frame().T)[0]
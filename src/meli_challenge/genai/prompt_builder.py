@@ -3,6 +3,70 @@ from __future__ import annotations
 import pandas as pd
 from .playbook import PLAYBOOK
 
+# Mensaje de sistema común a todos los backends (OpenAI y local)
+SYSTEM_MESSAGE = (
+    "Eres un analista comercial senior de Mercado Libre. "
+    "Tu tarea es diseñar estrategias comerciales claras, accionables "
+    "y alineadas a objetivos de negocio."
+)
+
+
+# Cabecera fija del prompt, idéntica para todos los sellers: va primero para
+# que el prefijo de tokens compartido (cacheado por el backend local) la
+# incluya completa.
+PROMPT_HEADER = """
+Eres un analista comercial senior de Mercado Libre.
+
+Con la información de abajo, genera una estrategia comercial personalizada con el siguiente formato:
+
+1) Objetivo principal (1 párrafo).
+2) 3–5 acciones concretas para el equipo comercial, separadas por viñetas.
+3) 2–3 KPIs clave para evaluar el impacto de la estrategia.
+
+La respuesta debe ser clara, accionable y escrita en un lenguaje orientado a negocio.
+"""
+
+
+# Métricas/etiquetas del perfil (seller_profile.csv) que se agregan al final
+# del prompt cuando están presentes: personalizan la estrategia y hacen que
+# el prompt (y su embedding en `semantic_cache`) varíe entre sellers de un
+# mismo segmento. Formato por columna.
+PROFILE_FIELDS = {
+    "main_category": "{}",
+    "logistic_type": "{}",
+    "seller_reputation": "{}",
+    "clasificacion_diversificacion": "{}",
+    "clasificacion_calidad": "{}",
+    "clasificacion_precio": "{}",
+    "n_items": "{:.0f}",
+    "n_categories": "{:.0f}",
+    "pct_new": "{:.0%}",
+    "avg_price_regular": "{:,.0f}",
+    "avg_price_index": "{:.2f}",
+    "avg_discount_depth": "{:.0%}",
+    "total_value": "{:,.0f}",
+}
+
+
+def _profile_lines(row: pd.Series) -> str:
+    lines = []
+    for col, fmt in PROFILE_FIELDS.items():
+        value = row.get(col)
+        if value is None or pd.isna(value):
+            continue
+        try:
+            text = fmt.format(value)
+        except (TypeError, ValueError):
+            text = str(value)
+        lines.append(f"- {col}: {text}")
+    return "\n".join(lines)
+
+
+def build_metrics_block(row: pd.Series) -> str:
+    """Bloque "Métricas del seller" con los `PROFILE_FIELDS` presentes ("" si no hay)."""
+    metrics = _profile_lines(row)
+    return f"Métricas del seller:\n{metrics}\n" if metrics else ""
+
 
 def build_prompt_for_seller(row: pd.Series) -> str:
     """
@@ -10,7 +74,12 @@ def build_prompt_for_seller(row: pd.Series) -> str:
       - seller_nickname
       - seller_size
       - performance_level
+      - las métricas de `PROFILE_FIELDS` presentes en `row`
     y del playbook de negocio.
+
+    Orden de mayor a menor reutilización: cabecera fija (común a todos),
+    playbook del segmento (común por seller_size + performance_level) y al
+    final los campos propios del seller.
     """
     nickname = row["seller_nickname"]
     size = row["seller_size"]
@@ -29,24 +98,25 @@ def build_prompt_for_seller(row: pd.Series) -> str:
         },
     )
 
-    prompt = f"""
-Eres un analista comercial senior de Mercado Libre.
-
-Perfil del seller:
-- seller_nickname: {nickname}
-- seller_size: {size}
-- performance_level: {level}
-
+    prompt = f"""{PROMPT_HEADER}
 Playbook de referencia para este segmento:
 - Objetivo sugerido: {base["objetivo"]}
 - Líneas sugeridas: {", ".join(base["lineas"])}
 
-Con esta información, genera una estrategia comercial personalizada con el siguiente formato:
+Perfil del seller:
+- seller_size: {size}
+- performance_level: {level}
+- seller_nickname: {nickname}
+"""
+    metrics = build_metrics_block(row)
+    if metrics:
+        prompt += f"\n{metrics}"
+    return prompt
 
-1) Objetivo principal (1 párrafo).
-2) 3–5 acciones concretas para el equipo comercial, separadas por viñetas.
-3) 2–3 KPIs clave para evaluar el impacto de la estrategia.
 
-La respuesta debe ser clara, accionable y escrita en un lenguaje orientado a negocio.
-"""
-    return prompt
\ No newline at end of file
+def build_messages_for_seller(row: pd.Series) -> list[dict]:
+    """Mensajes de chat (system + user) para el seller."""
+    return [
+        {"role": "system", "content": SYSTEM_MESSAGE},
+        {"role": "user", "content": build_prompt_for_seller(row)},
+    ]
\ No newline at end of file
@@ -0,0 +1,311 @@
+# src/meli_challenge/genai/semantic_cache.py
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from ..clustering import CLUSTER_FEATURE_COLS, build_feature_matrix
+from .prompt_builder import PROFILE_FIELDS, build_metrics_block, build_prompt_for_seller
+
+# Alcance del texto generado en `generate_with_reuse`: depende solo del
+# segmento (y del nickname, que se adapta); las cifras propias van aparte
+REUSED_TEXT_SCOPE = "segment"
+
+# Mismas métricas (y transformación log1p / NaN -> 0) que el clustering
+DEFAULT_FEATURE_COLS = tuple(CLUSTER_FEATURE_COLS)
+
+DEFAULT_EMBEDDING_MODEL = "paraphrase-multilingual-MiniLM-L12-v2"
+
+
+def _l2_normalize(mat: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(mat, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return mat / norms
+
+
+def standardized_features(
+    df: pd.DataFrame, feature_cols: Sequence[str] = DEFAULT_FEATURE_COLS
+) -> np.ndarray:
+    """
+    Matriz float32 estandarizada (z-score) con las métricas del seller.
+
+    Usa `clustering.build_feature_matrix` sobre las columnas de
+    `feature_cols` presentes en `df`; si no hay ninguna, devuelve una matriz
+    de ancho 0.
+    """
+    cols = [c for c in feature_cols if c in df.columns]
+    if not cols:
+        return np.zeros((len(df), 0), dtype=np.float32)
+
+    mat = build_feature_matrix(df, cols).astype(np.float64)
+    std = mat.std(axis=0)
+    std[std == 0] = 1.0
+    mat = (mat - mat.mean(axis=0)) / std
+    return mat.astype(np.float32)
+
+
+def embed_prompts(
+    prompts: Sequence[str],
+    model_name: str = DEFAULT_EMBEDDING_MODEL,
+    batch_size: int = 64,
+) -> np.ndarray:
+    """Embeddings normalizados de los prompts con sentence-transformers."""
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_name)
+    emb = model.encode(
+        list(prompts),
+        batch_size=batch_size,
+        normalize_embeddings=True,
+        show_progress_bar=False,
+    )
+    return np.asarray(emb, dtype=np.float32)
+
+
+def _mask_nickname(prompt: str, nickname: str) -> str:
+    # El nickname no aporta semántica y haría distintos prompts idénticos
+    return prompt.replace(str(nickname), "<seller>")
+
+
+def adapt_strategy(strategy: str, source_nickname: str, target_nickname: str) -> str:
+    """
+    Adapta una estrategia reutilizada al seller destino (solo el nickname).
+
+    Supone texto a nivel segmento: `generate_with_reuse` genera sin las
+    métricas de `PROFILE_FIELDS`, así que no quedan cifras del seller origen.
+    """
+    return strategy.replace(str(source_nickname), str(target_nickname))
+
+
+@dataclass
+class ReuseReport:
+    """Resultado de `generate_with_reuse`: detalle por seller + resumen."""
+
+    detail: pd.DataFrame
+    threshold: float
+    summary: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def hit_rate(self) -> float:
+        return self.summary.get("hit_rate", 0.0)
+
+
+class SemanticStrategyCache:
+    """
+    Capa de reutilización semántica de estrategias.
+
+    Cada seller se representa como la concatenación (ponderada) del embedding
+    de su prompt y de su vector de métricas estandarizado; ambos bloques
+    están normalizados, por lo que la similitud coseno resultante es el
+    promedio ponderado de las dos similitudes. El prompt incluye, además del
+    segmento y el playbook, las etiquetas y métricas propias del seller
+    (`prompt_builder.PROFILE_FIELDS`), así que el embedding de texto también
+    distingue sellers dentro de un mismo segmento. Los vecinos se obtienen con un
+    índice aproximado (pynndescent) construido una sola vez sobre todo el
+    lote.
+
+    Un seller reutiliza la estrategia de un vecino ya generado si:
+      - comparten `seller_size` y `performance_level` (mismo playbook), y
+      - la similitud es >= `threshold`.
+
+    Las métricas sirven para elegir vecinos, pero el texto se genera sin
+    ellas (nivel segmento) y a cada estrategia se le agrega el bloque de
+    métricas del propio seller: un hit nunca arrastra cifras del origen.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.95,
+        feature_cols: Sequence[str] = DEFAULT_FEATURE_COLS,
+        feature_weight: float = 0.5,
+        n_neighbors: int = 15,
+        model_name: str = DEFAULT_EMBEDDING_MODEL,
+        embed_fn: Optional[Callable[[Sequence[str]], np.ndarray]] = None,
+    ) -> None:
+        if not 0.0 <= threshold <= 1.0:
+            raise ValueError("threshold debe estar en [0, 1].")
+        if not 0.0 <= feature_weight <= 1.0:
+            raise ValueError("feature_weight debe estar en [0, 1].")
+
+        self.threshold = threshold
+        self.feature_cols = tuple(feature_cols)
+        self.feature_weight = feature_weight
+        self.n_neighbors = n_neighbors
+        self.model_name = model_name
+        self.embed_fn = embed_fn
+
+    def embed(self, df: pd.DataFrame) -> np.ndarray:
+        """Vector combinado (prompt + métricas) por seller, normalizado."""
+        prompts = [
+            _mask_nickname(build_prompt_for_seller(row), row["seller_nickname"])
+            for _, row in df.iterrows()
+        ]
+        if self.embed_fn is not None:
+            text_emb = np.asarray(self.embed_fn(prompts), dtype=np.float32)
+        else:
+            text_emb = embed_prompts(prompts, model_name=self.model_name)
+        text_emb = _l2_normalize(text_emb)
+
+        feats = standardized_features(df, self.feature_cols)
+        if feats.shape[1] == 0:
+            return text_emb
+
+        feats = _l2_normalize(feats)
+        w = self.feature_weight
+        return np.hstack(
+            [np.sqrt(1.0 - w) * text_emb, np.sqrt(w) * feats]
+        ).astype(np.float32)
+
+    def neighbors(self, emb: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Vecinos más cercanos (índices, similitud coseno) de cada fila.
+
+        Para lotes pequeños se hace la búsqueda exacta; en otro caso se
+        construye un único índice NNDescent y se usa su grafo de vecinos.
+        """
+        n = len(emb)
+        k = min(self.n_neighbors, n)
+
+        if n <= max(4 * self.n_neighbors, 256):
+            sims = emb @ emb.T
+            idx = np.argsort(-sims, axis=1)[:, :k]
+            return idx, np.take_along_axis(sims, idx, axis=1)
+
+        from pynndescent import NNDescent
+
+        index = NNDescent(emb, metric="cosine", n_neighbors=k, random_state=42)
+        idx, dist = index.neighbor_graph
+        return idx, 1.0 - dist
+
+    def generate_with_reuse(
+        self,
+        df: pd.DataFrame,
+        generate_fn: Optional[Callable[[pd.Series], str]] = None,
+        generate_many_fn: Optional[Callable[[pd.DataFrame], List[str]]] = None,
+    ) -> ReuseReport:
+        """
+        Genera estrategias para todos los sellers de `df` reutilizando, cuando
+        es posible, la de un vecino ya generado en lugar de llamar al modelo.
+
+        Qué sellers se generan no depende del texto generado, así que primero
+        se decide generar/reutilizar para todo el lote y después se generan
+        los faltantes: con `generate_many_fn` en una sola llamada (p.ej.
+        `LocalStrategyGenerator.generate_many`, con batching y prefijo
+        compartido), si no con `generate_fn` fila a fila.
+
+        Las filas que reciben `generate_fn`/`generate_many_fn` no incluyen
+        las columnas de `PROFILE_FIELDS`, de modo que el texto generado es
+        reutilizable dentro del segmento; al final se agrega a cada
+        estrategia el bloque "Métricas del seller" de su propio seller.
+        """
+        if generate_fn is None and generate_many_fn is None:
+            raise ValueError("Se requiere `generate_fn` o `generate_many_fn`.")
+
+        df = df.reset_index(drop=True)
+        detail = pd.DataFrame(
+            {
+                "seller_nickname": df["seller_nickname"],
+                "seller_size": df["seller_size"],
+                "performance_level": df["performance_level"],
+            }
+        )
+        if df.empty:
+            detail = detail.assign(
+                strategy=[], source=[], reused_from=[], similarity=[]
+            )
+            return ReuseReport(detail, self.threshold, _summarize(detail, self.threshold))
+
+        emb = self.embed(df)
+        nn_idx, nn_sim = self.neighbors(emb)
+
+        segment = (df["seller_size"] + " - " + df["performance_level"]).to_numpy()
+        nicknames = df["seller_nickname"].to_numpy()
+
+        # 1) Decisión: generar o reutilizar de un vecino ya marcado para generar
+        is_generated = np.zeros(len(df), dtype=bool)
+        match_of = np.full(len(df), -1, dtype=np.int64)
+        similarity = np.full(len(df), np.nan)
+        for i in range(len(df)):
+            for j, sim in zip(nn_idx[i], nn_sim[i]):
+                if sim < self.threshold:
+                    break
+                if j != i and is_generated[j] and segment[j] == segment[i]:
+                    match_of[i] = j
+                    similarity[i] = float(sim)
+                    break
+            if match_of[i] < 0:
+                is_generated[i] = True
+
+        # 2) Generación de los faltantes, sin las métricas propias: el texto
+        # puede terminar en otro seller del segmento
+        segment_rows = df.drop(columns=[c for c in PROFILE_FIELDS if c in df.columns])
+        strategies: List[Optional[str]] = [None] * len(df)
+        to_generate = np.flatnonzero(is_generated)
+        if generate_many_fn is not None:
+            texts = generate_many_fn(segment_rows.iloc[to_generate])
+        else:
+            texts = [generate_fn(segment_rows.iloc[i]) for i in to_generate]
+        for i, text in zip(to_generate, texts):
+            strategies[i] = text
+
+        # 3) Reutilización adaptada al seller destino
+        for i in np.flatnonzero(~is_generated):
+            j = match_of[i]
+            strategies[i] = adapt_strategy(strategies[j], nicknames[j], nicknames[i])
+
+        # 4) Cifras del propio seller, fuera del texto compartido
+        for i in range(len(df)):
+            metrics = build_metrics_block(df.iloc[i])
+            if metrics:
+                strategies[i] = f"{strategies[i].rstrip()}\n\n{metrics}"
+
+        detail["strategy"] = strategies
+        detail["source"] = np.where(is_generated, "api", "reused")
+        detail["reused_from"] = [nicknames[j] if j >= 0 else None for j in match_of]
+        detail["similarity"] = similarity
+
+        return ReuseReport(detail, self.threshold, _summarize(detail, self.threshold))
+
+
+def _summarize(detail: pd.DataFrame, threshold: float) -> Dict[str, float]:
+    n = len(detail)
+    hits = int((detail["source"] == "reused").sum()) if n else 0
+    return {
+        "n_sellers": n,
+        "api_calls": n - hits,
+        "reused": hits,
+        "hit_rate": hits / n if n else 0.0,
+        "threshold": threshold,
+        "mean_similarity_reused": (
+            float(detail.loc[detail["source"] == "reused", "similarity"].mean())
+            if hits
+            else float("nan")
+        ),
+    }
+
+
+def hit_rate_report(report: ReuseReport) -> pd.DataFrame:
+    """
+    Hit-rate de reutilización por segmento (`seller_size`, `performance_level`).
+
+    `reused_text_scope` recuerda que el texto compartido es de nivel
+    segmento: las métricas del seller no forman parte de lo reutilizado.
+    """
+    detail = report.detail.assign(is_hit=report.detail["source"] == "reused")
+    out = (
+        detail.groupby(["seller_size", "performance_level"])
+        .agg(
+            n_sellers=("seller_nickname", "count"),
+            reused=("is_hit", "sum"),
+            mean_similarity=("similarity", "mean"),
+        )
+        .reset_index()
+    )
+    out["api_calls"] = out["n_sellers"] - out["reused"]
+    out["hit_rate"] = out["reused"] / out["n_sellers"]
+    out["reused_text_scope"] = REUSED_TEXT_SCOPE
+    return out
@@ -3,44 +3,63 @@
 from __future__ import annotations
 
 import pandas as pd
-from openai import OpenAI
-from .prompt_builder import build_prompt_for_seller
+from .prompt_builder import build_messages_for_seller
 from dotenv import load_dotenv
 import os
 
 load_dotenv()
 
-# Cliente global (usa OPENAI_API_KEY del entorno)
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+OPENAI_MODEL = "gpt-4.1-mini"  # o el modelo que estés usando en el notebook
 
+# Clientes globales, creados al primer uso para no exigir OPENAI_API_KEY
+# (ni red) cuando se trabaja con el backend local.
+_client = None
+_local_generator = None
 
-def generate_strategy(row: pd.Series) -> str:
+
+def _get_client():
+    global _client
+    if _client is None:
+        from openai import OpenAI
+
+        _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _client
+
+
+def get_local_generator(**kwargs):
+    """
+    Devuelve el generador local compartido (ver `local_backend`).
+
+    Si se pasan kwargs se crea uno nuevo con esa configuración.
     """
-    Genera una estrategia comercial usando la API de OpenAI
-    a partir de:
+    global _local_generator
+    if _local_generator is None or kwargs:
+        from .local_backend import LocalStrategyGenerator
+
+        _local_generator = LocalStrategyGenerator(**kwargs)
+    return _local_generator
+
+
+def generate_strategy(row: pd.Series, backend: str = "openai") -> str:
+    """
+    Genera una estrategia comercial a partir de:
       - seller_nickname
       - seller_size
       - performance_level
+
+    backend:
+      - "openai": API de OpenAI (requiere OPENAI_API_KEY).
+      - "local": modelo instruct pequeño en CPU vía transformers, sin red.
     """
-    prompt = build_prompt_for_seller(row)
+    if backend == "local":
+        return get_local_generator().generate(row)
+    if backend != "openai":
+        raise ValueError(f"Backend no soportado: {backend!r}")
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-4.1-mini",  # o el modelo que estés usando en el notebook
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "Eres un analista comercial senior de Mercado Libre. "
-                        "Tu tarea es diseñar estrategias comerciales claras, accionables "
-                        "y alineadas a objetivos de negocio."
-                    ),
-                },
-                {
-                    "role": "user",
-                    "content": prompt,
-                },
-            ],
+        response = _get_client().chat.completions.create(
+            model=OPENAI_MODEL,
+            messages=build_messages_for_seller(row),
             temperature=0.4,
             max_tokens=800,
         )
@@ -48,4 +67,4 @@ def generate_strategy(row: pd.Series) -> str:
         return response.choices[0].message.content
 
     except Exception as e:
-        return f"[ERROR al llamar a la API de OpenAI]: {e}"
\ No newline at end of file
+        return f"[ERROR al llamar a la API de OpenAI]: {e}"
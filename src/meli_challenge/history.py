@@ -0,0 +1,221 @@
+"""Run history of seller profiles and segment migration between runs.
+
+Every pipeline run stores a snapshot of the seller profile under
+``data/processed/history``. ``diff_runs`` compares two snapshots on
+integer-encoded seller keys and categorical segment codes: sellers and
+segments are mapped to dense ints once, and the "join" is array indexing,
+so the diff stays linear on millions of sellers.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .keys import SellerKeyEncoder
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+PROCESSED_DIR = PROJECT_ROOT / "data" / "processed"
+HISTORY_DIR = PROCESSED_DIR / "history"
+
+HISTORY_PREFIX = "seller_profile_"
+
+# Columnas que se guardan por corrida (las que existan en el perfil)
+HISTORY_COLS = [
+    "seller_nickname",
+    "seller_size",
+    "performance_level",
+    "performance_segment",
+    "total_value",
+    "total_score",
+]
+
+# Cortes de `add_seller_size` sobre total_value
+SIZE_QUANTILES = (0.30, 0.60, 0.90)
+
+
+def record_run(df: pd.DataFrame, run_id: Optional[str] = None) -> Path:
+    """Persist the seller profile of this run into the history store."""
+
+    HISTORY_DIR.mkdir(parents=True, exist_ok=True)
+    run_id = run_id or datetime.now().strftime("%Y%m%dT%H%M%S")
+    cols = [c for c in HISTORY_COLS if c in df.columns]
+    path = HISTORY_DIR / f"{HISTORY_PREFIX}{run_id}.csv"
+    df[cols].to_csv(path, index=False)
+    return path
+
+
+def list_runs() -> List[str]:
+    """Run ids in the history store, oldest first."""
+
+    if not HISTORY_DIR.exists():
+        return []
+    return sorted(
+        p.stem[len(HISTORY_PREFIX):] for p in HISTORY_DIR.glob(f"{HISTORY_PREFIX}*.csv")
+    )
+
+
+def load_run(run_id: str) -> pd.DataFrame:
+    path = HISTORY_DIR / f"{HISTORY_PREFIX}{run_id}.csv"
+    if not path.exists():
+        raise FileNotFoundError(f"Run {run_id!r} not found at {path}")
+    return pd.read_csv(path, dtype={"seller_nickname": str})
+
+
+def previous_run_id(run_id: Optional[str] = None) -> Optional[str]:
+    """Latest run id strictly before ``run_id`` (or the latest overall)."""
+
+    runs = list_runs()
+    if run_id is not None:
+        runs = [r for r in runs if r < run_id]
+    return runs[-1] if runs else None
+
+
+@dataclass
+class SegmentDiff:
+    """Result of comparing two seller profile runs."""
+
+    transitions: pd.DataFrame  # matriz previo (filas) x actual (columnas)
+    changed: pd.DataFrame  # sellers que cambiaron de segmento
+    new_sellers: pd.DataFrame
+    dropped_sellers: pd.DataFrame
+    threshold_drift: pd.DataFrame
+
+    def sellers_needing_strategy(self) -> pd.Series:
+        """Sellers con segmento nuevo o distinto: requieren una nueva estrategia."""
+
+        return pd.concat(
+            [self.changed["seller_nickname"], self.new_sellers["seller_nickname"]],
+            ignore_index=True,
+        )
+
+
+def _encode(
+    prev: pd.Series, curr: pd.Series
+) -> Tuple[np.ndarray, np.ndarray, pd.Index]:
+    """Dense int codes for two series over their shared vocabulary."""
+
+    codes, uniques = pd.factorize(pd.concat([prev, curr], ignore_index=True))
+    return codes[: len(prev)], codes[len(prev):], pd.Index(uniques)
+
+
+def _encode_sellers(
+    prev: pd.Series, curr: pd.Series
+) -> Tuple[np.ndarray, np.ndarray, pd.Index]:
+    """Like ``_encode`` but factorizing int64 seller keys instead of strings."""
+
+    both = pd.concat([prev, curr], ignore_index=True)
+    encoder = SellerKeyEncoder().fit(both)
+    codes, uniques = pd.factorize(encoder.transform(both))
+    sellers = pd.Index(encoder.inverse_transform(uniques))
+    return codes[: len(prev)], codes[len(prev):], sellers
+
+
+def _threshold_drift(prev: pd.DataFrame, curr: pd.DataFrame) -> pd.DataFrame:
+    rows = []
+    if "total_value" in prev.columns and "total_value" in curr.columns:
+        prev_q = np.quantile(prev["total_value"].fillna(0), SIZE_QUANTILES)
+        curr_q = np.quantile(curr["total_value"].fillna(0), SIZE_QUANTILES)
+        for q, p, c in zip(SIZE_QUANTILES, prev_q, curr_q):
+            rows.append((f"total_value_p{int(q * 100)}", p, c))
+    if "total_score" in prev.columns and "total_score" in curr.columns:
+        rows.append(("total_score_mean", prev["total_score"].mean(), curr["total_score"].mean()))
+    rows.append(("n_sellers", len(prev), len(curr)))
+
+    out = pd.DataFrame(rows, columns=["metric", "previous", "current"])
+    out["delta"] = out["current"] - out["previous"]
+    out["delta_pct"] = out["delta"] / out["previous"].where(out["previous"] != 0)
+    return out
+
+
+def diff_runs(
+    prev: pd.DataFrame,
+    curr: pd.DataFrame,
+    segment_col: str = "performance_segment",
+) -> SegmentDiff:
+    """
+    Compare two seller profiles.
+
+    Sellers are encoded to int64 keys (``keys.SellerKeyEncoder``) and then
+    to dense codes over the union of both runs, and segments to categorical
+    codes; the per-key segment arrays are then compared element-wise and
+    the transition matrix is a single bincount.
+    """
+
+    for name, frame in (("prev", prev), ("curr", curr)):
+        missing = [c for c in ("seller_nickname", segment_col) if c not in frame.columns]
+        if missing:
+            raise ValueError(f"Faltan columnas en {name}: {missing}")
+
+    prev_key, curr_key, sellers = _encode_sellers(
+        prev["seller_nickname"], curr["seller_nickname"]
+    )
+    prev_seg, curr_seg, segments = _encode(prev[segment_col], curr[segment_col])
+    n_keys, n_seg = len(sellers), len(segments)
+
+    # Segmento por seller key (-1 = ausente en esa corrida)
+    seg_before = np.full(n_keys, -1, dtype=np.int64)
+    seg_after = np.full(n_keys, -1, dtype=np.int64)
+    seg_before[prev_key] = prev_seg
+    seg_after[curr_key] = curr_seg
+
+    in_both = (seg_before >= 0) & (seg_after >= 0)
+    counts = np.bincount(
+        seg_before[in_both] * n_seg + seg_after[in_both], minlength=n_seg * n_seg
+    ).reshape(n_seg, n_seg)
+    transitions = pd.DataFrame(counts, index=segments, columns=segments)
+    transitions.index.name = f"{segment_col}_previous"
+    transitions.columns.name = f"{segment_col}_current"
+    active = (transitions.sum(axis=1) > 0) | (transitions.sum(axis=0) > 0)
+    transitions = transitions.loc[active, active]
+
+    seg_labels = np.asarray(segments, dtype=object)
+    moved = np.flatnonzero(in_both & (seg_before != seg_after))
+    changed = pd.DataFrame(
+        {
+            "seller_nickname": sellers[moved],
+            "segment_previous": seg_labels[seg_before[moved]],
+            "segment_current": seg_labels[seg_after[moved]],
+        }
+    )
+
+    new_idx = np.flatnonzero((seg_before < 0) & (seg_after >= 0))
+    gone_idx = np.flatnonzero((seg_before >= 0) & (seg_after < 0))
+    new_sellers = pd.DataFrame(
+        {"seller_nickname": sellers[new_idx], "segment_current": seg_labels[seg_after[new_idx]]}
+    )
+    dropped_sellers = pd.DataFrame(
+        {"seller_nickname": sellers[gone_idx], "segment_previous": seg_labels[seg_before[gone_idx]]}
+    )
+
+    return SegmentDiff(
+        transitions=transitions,
+        changed=changed,
+        new_sellers=new_sellers,
+        dropped_sellers=dropped_sellers,
+        threshold_drift=_threshold_drift(prev, curr),
+    )
+
+
+def save_diff(diff: SegmentDiff, output_dir: Path = PROCESSED_DIR) -> Sequence[Path]:
+    """Write the diff tables into ``output_dir``."""
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    paths = [
+        output_dir / "segment_transitions.csv",
+        output_dir / "segment_changes.csv",
+        output_dir / "segment_new_sellers.csv",
+        output_dir / "segment_dropped_sellers.csv",
+        output_dir / "threshold_drift.csv",
+    ]
+    diff.transitions.to_csv(paths[0])
+    diff.changed.to_csv(paths[1], index=False)
+    diff.new_sellers.to_csv(paths[2], index=False)
+    diff.dropped_sellers.to_csv(paths[3], index=False)
+    diff.threshold_drift.to_csv(paths[4], index=False)
+    return paths
@@ -0,0 +1,203 @@
+"""Integer encoding of ``seller_nickname`` for fast groupby/merge.
+
+Nicknames in the challenge feed are fixed-width lowercase hex strings
+(``0007153bca``), so they are parsed straight into int64 with a vectorized
+byte lookup and decoded back by formatting the digits again. Any other id
+format falls back to a dictionary encoder (``pd.factorize`` vocabulary).
+
+Seller-level aggregation runs on the int64 ``seller_key``; nicknames are
+only rebuilt when a seller table is exported. Null nicknames get the
+reserved key ``NULL_KEY`` (-1), which seller aggregations exclude, like a
+groupby on the nickname drops NaN keys.
+"""
+
+from __future__ import annotations
+
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+KEY_COL = "seller_key"
+
+# Key reservada para seller_nickname nulo (las keys válidas son >= 0)
+NULL_KEY = -1
+
+# Hasta 15 dígitos hex caben en un int64 positivo
+MAX_HEX_WIDTH = 15
+
+_HEX_DIGITS = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+_HEX_LOOKUP = np.full(256, 255, dtype=np.uint8)
+_HEX_LOOKUP[_HEX_DIGITS] = np.arange(16, dtype=np.uint8)
+
+
+def _parse_hex(values: np.ndarray, width: int) -> Optional[np.ndarray]:
+    """int64 keys for fixed-width lowercase hex strings, or None if not all are."""
+
+    # Un byte extra detecta strings más largos que `width` (que se truncarían)
+    try:
+        fixed = values.astype(f"S{width + 1}")
+    except (UnicodeEncodeError, ValueError, TypeError):
+        return None
+    raw = fixed.view(np.uint8).reshape(len(fixed), width + 1)
+    if raw[:, width].any():
+        return None
+    digits = _HEX_LOOKUP[raw[:, :width]]
+    if (digits == 255).any():  # caracteres no-hex, o strings más cortos (padding \0)
+        return None
+    powers = np.int64(16) ** np.arange(width - 1, -1, -1, dtype=np.int64)
+    return digits.astype(np.int64) @ powers
+
+
+class SellerKeyEncoder:
+    """Bidirectional ``seller_nickname`` <-> int64 ``seller_key`` mapping."""
+
+    def __init__(self) -> None:
+        self.mode: Optional[str] = None  # "hex" o "dict"
+        self.width: Optional[int] = None
+        self.vocabulary: Optional[pd.Index] = None
+
+    def fit(self, nicknames: pd.Series) -> "SellerKeyEncoder":
+        self._fit(nicknames)
+        return self
+
+    def _fit(self, nicknames: pd.Series) -> Optional[np.ndarray]:
+        """Pick the encoding; returns the parsed keys in hex mode."""
+
+        values = nicknames.to_numpy(dtype=object)
+        non_null = values[pd.notna(values)] if len(values) else values
+        width = len(str(non_null[0])) if len(non_null) else 0
+
+        # _parse_hex ya rechaza largos distintos de `width`; los nulos van a NULL_KEY
+        if 0 < width <= MAX_HEX_WIDTH:
+            keys = self._parse_with_nulls(values, width)
+            if keys is not None:
+                self.mode, self.width = "hex", width
+                return keys
+
+        self.mode = "dict"
+        self.vocabulary = pd.Index(pd.unique(nicknames.dropna().to_numpy(dtype=object)))
+        return None
+
+    @staticmethod
+    def _parse_with_nulls(values: np.ndarray, width: int) -> Optional[np.ndarray]:
+        """``_parse_hex`` with nulls mapped to ``NULL_KEY``.
+
+        The null check only runs when the fast path fails.
+        """
+
+        keys = _parse_hex(values, width)
+        if keys is not None:
+            return keys
+        null = pd.isna(values)
+        if not null.any() or null.all():
+            return None
+        parsed = _parse_hex(values[~null], width)
+        if parsed is None:
+            return None
+        keys = np.full(len(values), NULL_KEY, dtype=np.int64)
+        keys[~null] = parsed
+        return keys
+
+    def transform(self, nicknames: pd.Series) -> np.ndarray:
+        """int64 keys; unseen nicknames extend the dictionary vocabulary.
+
+        Null nicknames get ``NULL_KEY``.
+        """
+
+        if self.mode is None:
+            raise ValueError("SellerKeyEncoder no ajustado: llamar a fit primero.")
+
+        values = nicknames.to_numpy(dtype=object)
+        if self.mode == "hex":
+            keys = self._parse_with_nulls(values, self.width)
+            if keys is None:
+                raise ValueError(f"Nicknames fuera del formato hex de {self.width} caracteres.")
+            return keys
+
+        null = pd.isna(values)
+        keys = self.vocabulary.get_indexer(values)
+        unseen = (keys < 0) & ~null
+        if unseen.any():
+            self.vocabulary = self.vocabulary.append(pd.Index(pd.unique(values[unseen])))
+            keys = self.vocabulary.get_indexer(values)
+        keys[null] = NULL_KEY
+        return keys.astype(np.int64)
+
+    def fit_transform(self, nicknames: pd.Series) -> np.ndarray:
+        keys = self._fit(nicknames)
+        return keys if keys is not None else self.transform(nicknames)
+
+    def inverse_transform(self, keys: np.ndarray) -> np.ndarray:
+        """Nicknames (object array) for int64 keys (``NULL_KEY`` -> None)."""
+
+        keys = np.asarray(keys, dtype=np.int64)
+        null = keys == NULL_KEY
+        safe = np.where(null, 0, keys)
+        if self.mode == "hex":
+            shifts = np.arange(self.width - 1, -1, -1, dtype=np.int64) * 4
+            digits = _HEX_DIGITS[(safe[:, None] >> shifts) & 15]
+            out = digits.view(f"S{self.width}").ravel().astype(str).astype(object)
+        elif len(self.vocabulary):
+            out = self.vocabulary.to_numpy(dtype=object)[safe]
+        else:
+            out = np.full(len(keys), None, dtype=object)
+        if null.any():
+            out[null] = None
+        return out
+
+
+def mode_by_key(keys: np.ndarray, values: np.ndarray) -> pd.Series:
+    """
+    Most frequent value per key (ties -> smallest value, like ``mode()[0]``).
+
+    One groupby on (key, value) plus a stable sort, instead of a per-seller
+    ``mode`` in Python. NaN values are ignored.
+    """
+
+    counts = (
+        pd.DataFrame({"key": keys, "value": values})
+        .groupby(["key", "value"], sort=True)
+        .size()
+        .reset_index(name="n")
+    )
+    counts = counts.sort_values(["key", "n"], ascending=[True, False], kind="stable")
+    first = counts.drop_duplicates("key")
+    return pd.Series(first["value"].to_numpy(), index=first["key"].to_numpy())
+
+
+def encode_seller_keys(
+    df: pd.DataFrame, encoder: Optional[SellerKeyEncoder] = None
+) -> Tuple[pd.DataFrame, SellerKeyEncoder]:
+    """
+    Add the int64 ``seller_key`` column to an item-level DataFrame.
+
+    Returns ``(df, encoder)``; pass the encoder back to decode at export.
+    """
+
+    if "seller_nickname" not in df.columns:
+        raise ValueError("Se requiere la columna 'seller_nickname'.")
+
+    out = df.copy()
+    if encoder is None:
+        encoder = SellerKeyEncoder()
+        out[KEY_COL] = encoder.fit_transform(out["seller_nickname"])
+    else:
+        out[KEY_COL] = encoder.transform(out["seller_nickname"])
+    return out, encoder
+
+
+def decode_seller_keys(
+    df: pd.DataFrame, encoder: SellerKeyEncoder, drop_key: bool = False
+) -> pd.DataFrame:
+    """(Re)build ``seller_nickname`` from ``seller_key`` as the first column."""
+
+    out = df.copy()
+    nicknames = encoder.inverse_transform(out[KEY_COL].to_numpy())
+    if "seller_nickname" in out.columns:
+        out["seller_nickname"] = nicknames
+    else:
+        out.insert(0, "seller_nickname", nicknames)
+    if drop_key:
+        out = out.drop(columns=KEY_COL)
+    return out
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Tuple
+from typing import List, Tuple
 
+import numpy as np
 import pandas as pd
 
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
@@ -35,86 +36,122 @@ LOG_SCORE_MAP = {
 }
 
 
-def _classify_performance(row: pd.Series) -> str:
+# Flags de riesgo en `performance_reason` (R=alto_riesgo, D=Disperso, F=FBM)
+FLAG_CODES = ("R", "D", "F")
+
+
+def _performance_rules(
+    out: pd.DataFrame,
+) -> Tuple[List[Tuple[str, np.ndarray, str]], np.ndarray]:
     """
     Lógica de negocio para asignar performance_level por seller,
     usando seller_size + scores de diversificación, calidad y logística.
 
+    Devuelve las reglas en orden de prioridad como (código, máscara, nivel)
+    -la primera máscara verdadera de cada fila decide el nivel (np.select),
+    igual que el if/elif original fila a fila- y las flags de riesgo
+    (alto_riesgo, Disperso, FBM) apiladas en un array (3, n_sellers).
+
     Niveles:
         - Diamante
         - Top performance
         - Expected performance
         - Low performance
     """
-    size = row["seller_size"]
-    div_score = row["div_score"]
-    qual_score = row["qual_score"]
-    log_score = row["log_score"]
-    total = row["total_score"]
-
-    has_low_quality = (row["clasificacion_calidad"] == "alto_riesgo")
-    is_disperso = (row["clasificacion_diversificacion"] == "Disperso")
-    is_fbm = (row["logistic_type"] == "FBM")
-
-    # 0) Diamante – nivel global, por encima de Top
-    if (
-        total == 6
-        and not has_low_quality
-        and not is_disperso
-        and not is_fbm
-    ):
-        return "Diamante"
-
-    # 1) Reglas por seller_size
-
-    # --- Key Account (muy exigente) ---
-    if size == "Key Account":
+    size = out["seller_size"].to_numpy()
+    div_score = out["div_score"].to_numpy(dtype=float)
+    qual_score = out["qual_score"].to_numpy(dtype=float)
+    log_score = out["log_score"].to_numpy(dtype=float)
+    total = out["total_score"].to_numpy(dtype=float)
+
+    has_low_quality = (out["clasificacion_calidad"] == "alto_riesgo").to_numpy()
+    is_disperso = (out["clasificacion_diversificacion"] == "Disperso").to_numpy()
+    is_fbm = (out["logistic_type"] == "FBM").to_numpy()
+
+    # NaN en los scores: toda comparación es False, como en la versión fila a fila
+    with np.errstate(invalid="ignore"):
+        rules = [
+            # 0) Diamante – nivel global, por encima de Top
+            ("DIA", (total == 6) & ~has_low_quality & ~is_disperso & ~is_fbm, "Diamante"),
+        ]
+
+        # --- Key Account (muy exigente) ---
         # TOP: perfil muy alto (≥5) sin riesgos fuertes
-        if (total >= 5) and not has_low_quality and not is_disperso and not is_fbm:
-            return "Top performance"
         # LOW: mala calidad, disperso o score muy bajo
-        if has_low_quality or is_disperso or total <= 2:
-            return "Low performance"
-        # resto
-        return "Expected performance"
-
-    # --- Core Seller ---
-    if size == "Core Seller":
+        ka = size == "Key Account"
+        rules += [
+            ("KA.TOP", ka & (total >= 5) & ~has_low_quality & ~is_disperso & ~is_fbm, "Top performance"),
+            ("KA.LOW", ka & (has_low_quality | is_disperso | (total <= 2)), "Low performance"),
+            ("KA.EXP", ka, "Expected performance"),
+        ]
+
+        # --- Core Seller ---
         # TOP: score alto (≥5) y sin riesgo fuerte
-        if (total >= 5) and not has_low_quality and not is_disperso:
-            return "Top performance"
-        if has_low_quality or total <= 1:
-            return "Low performance"
-        return "Expected performance"
-
-    # --- Local Hero ---
-    if size == "Local Hero":
+        cs = size == "Core Seller"
+        rules += [
+            ("CS.TOP", cs & (total >= 5) & ~has_low_quality & ~is_disperso, "Top performance"),
+            ("CS.LOW", cs & (has_low_quality | (total <= 1)), "Low performance"),
+            ("CS.EXP", cs, "Expected performance"),
+        ]
+
+        # --- Local Hero ---
         # TOP: buena calidad + score alto + no disperso
-        if (qual_score == 2) and (total >= 5) and not is_disperso:
-            return "Top performance"
-        if has_low_quality or (total <= 2 and is_disperso):
-            return "Low performance"
-        return "Expected performance"
-
-    # --- Long Tail ---
-    if size == "Long Tail":
+        lh = size == "Local Hero"
+        rules += [
+            ("LH.TOP", lh & (qual_score == 2) & (total >= 5) & ~is_disperso, "Top performance"),
+            ("LH.LOW", lh & (has_low_quality | ((total <= 2) & is_disperso)), "Low performance"),
+            ("LH.EXP", lh, "Expected performance"),
+        ]
+
+        # --- Long Tail ---
         # TOP: pequeño pero sólido en todo (ningún eje en 0) y total razonable
-        if (
-            total >= 4
-            and div_score >= 1
-            and qual_score >= 1
-            and log_score >= 1
-        ):
-            return "Top performance"
-        if has_low_quality or total <= 1:
-            return "Low performance"
-        return "Expected performance"
-
-    # fallback
-    return "Expected performance"
-
-
-def add_performance_level(df: pd.DataFrame) -> pd.DataFrame:
+        lt = size == "Long Tail"
+        rules += [
+            (
+                "LT.TOP",
+                lt & (total >= 4) & (div_score >= 1) & (qual_score >= 1) & (log_score >= 1),
+                "Top performance",
+            ),
+            ("LT.LOW", lt & (has_low_quality | (total <= 1)), "Low performance"),
+            ("LT.EXP", lt, "Expected performance"),
+        ]
+
+    return rules, np.stack([has_low_quality, is_disperso, is_fbm])
+
+
+def _reason_codes(
+    out: pd.DataFrame, rules: List[Tuple[str, np.ndarray, str]], flags: np.ndarray
+) -> np.ndarray:
+    """
+    `performance_reason` compacto: ``<regla>|<flags>|T<total>``, p.ej.
+    ``KA.LOW|R+D|T2`` (Key Account, regla LOW; alto_riesgo y Disperso) o
+    ``DIA|-|T6``. Ramas: KA=Key Account, CS=Core Seller, LH=Local Hero,
+    LT=Long Tail; reglas TOP/LOW/EXP; ``FALLBACK`` si no aplica ninguna.
+
+    Regla, flags y total se combinan en un entero por fila; sólo se arma
+    el string de cada combinación presente (pocas) en una tabla que luego
+    se indexa.
+    """
+    rule_idx = np.select([mask for _, mask, _ in rules], np.arange(len(rules)), len(rules))
+    rule_names = [code for code, _, _ in rules] + ["FALLBACK"]
+
+    flag_idx = flags[0] * 4 + flags[1] * 2 + flags[2]
+
+    total = out["total_score"].to_numpy(dtype=float)
+    # 0..6 -> total, 7 -> desconocido (NaN)
+    total_idx = np.where(np.isnan(total), 7, np.clip(np.nan_to_num(total), 0, 6)).astype(np.int64)
+
+    combined = (rule_idx * 8 + flag_idx) * 8 + total_idx
+    table = np.empty(len(rule_names) * 64, dtype=object)
+    for code in np.flatnonzero(np.bincount(combined, minlength=len(table))):
+        rule, rest = divmod(int(code), 64)
+        flag, tot = divmod(rest, 8)
+        set_flags = [f for bit, f in zip((4, 2, 1), FLAG_CODES) if flag & bit]
+        table[code] = f"{rule_names[rule]}|{'+'.join(set_flags) or '-'}|T{tot if tot < 7 else '?'}"
+    return table[combined]
+
+
+def add_performance_level(df: pd.DataFrame, explain: bool = False) -> pd.DataFrame:
     """
     Añade al DataFrame a nivel seller:
 
@@ -124,6 +161,7 @@ def add_performance_level(df: pd.DataFrame) -> pd.DataFrame:
         - total_score
         - performance_level
         - performance_segment
+        - performance_reason (sólo con ``explain=True``; ver `_reason_codes`)
 
     Requiere columnas previas:
         - seller_size
@@ -151,9 +189,16 @@ def add_performance_level(df: pd.DataFrame) -> pd.DataFrame:
 
     out["total_score"] = out["div_score"] + out["qual_score"] + out["log_score"]
 
-    # Clasificación final
-    out["performance_level"] = out.apply(_classify_performance, axis=1)
+    # Clasificación final (máscaras vectorizadas, sin apply fila a fila)
+    rules, flags = _performance_rules(out)
+    out["performance_level"] = np.select(
+        [mask for _, mask, _ in rules],
+        [level for _, _, level in rules],
+        "Expected performance",  # fallback
+    )
     out["performance_segment"] = out["seller_size"] + " - " + out["performance_level"]
+    if explain:
+        out["performance_reason"] = _reason_codes(out, rules, flags)
 
     return out
 
@@ -0,0 +1,389 @@
+"""Fast sampled profiling of the raw and curated datasets.
+
+Lightweight replacement for the full ydata-profiling run behind
+``eda_report.html``. It only covers the checks the pipeline relies on
+(null rates, price/stock tails, reputation mix, category cardinality) and
+works in one streaming pass:
+
+- exact counts (rows, nulls, reputation mix) are accumulated per chunk;
+- distinct counts use HyperLogLog sketches, mergeable across chunks;
+- quantiles come from a uniform reservoir sample of the rows;
+- columns within a chunk are processed in a thread pool.
+"""
+
+from __future__ import annotations
+
+import html
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .data_prep import (
+    PROCESSED_DIR,
+    RAW_DATA_DIR,
+    RAW_SCHEMA,
+    discover_raw_files,
+    prune_partitions,
+    read_raw_file,
+)
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+OUTPUTS_DIR = PROJECT_ROOT / "data" / "outputs"
+
+TAIL_QUANTILES = (0.50, 0.90, 0.95, 0.99, 0.999)
+TAIL_COLS = ("price", "stock", "regular_price", "stock_norm")
+DISTINCT_COLS = ("seller_nickname", "category_id", "url", "titulo")
+
+
+_FNV_OFFSET = np.uint64(1469598103934665603)
+_FNV_PRIME = np.uint64(1099511628211)
+
+
+def _hash_values(uniques, block: int = 65536) -> np.ndarray:
+    """64-bit hashes of distinct values.
+
+    Strings are hashed vectorized (FNV-1a over the UTF-32 code points of a
+    fixed-width array, plus a murmur finalizer), in blocks to bound the
+    fixed-width buffer; this is several times faster than
+    ``pd.util.hash_array`` on object strings. Other dtypes use pandas.
+
+    Only the real code points of each string enter the hash (the padding
+    of the fixed-width block is masked out), so a value hashes the same in
+    any block or chunk and the HyperLogLog sketches merge consistently.
+    """
+
+    values = np.asarray(uniques, dtype=object)
+    if pd.api.types.infer_dtype(values, skipna=False) != "string":
+        return pd.util.hash_array(values)
+
+    out = np.empty(len(values), dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for start in range(0, len(values), block):
+            fixed = values[start : start + block].astype("U")
+            points = fixed.view(np.uint32).reshape(len(fixed), -1)
+            lengths = np.char.str_len(fixed)
+            acc = np.full(len(fixed), _FNV_OFFSET)
+            for j in range(points.shape[1]):
+                acc = np.where(j < lengths, (acc ^ points[:, j]) * _FNV_PRIME, acc)
+            acc ^= acc >> np.uint64(33)
+            acc *= np.uint64(0xFF51AFD7ED558CCD)
+            acc ^= acc >> np.uint64(33)
+            out[start : start + block] = acc
+    return out
+
+
+class HyperLogLog:
+    """HyperLogLog distinct counter (2^p one-byte registers)."""
+
+    def __init__(self, p: int = 14) -> None:
+        self.p = p
+        self.m = 1 << p
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    def update(self, values: np.ndarray) -> None:
+        codes, uniques = pd.factorize(values)
+        self.update_codes(codes[codes >= 0], uniques)
+
+    def update_codes(self, codes: np.ndarray, uniques) -> None:
+        """Update from factorized values: only the uniques are hashed."""
+
+        if len(codes) == 0:
+            return
+        h = _hash_values(uniques)[codes]
+        idx = (h >> np.uint64(64 - self.p)).astype(np.int64)
+        w = h & np.uint64((1 << (64 - self.p)) - 1)
+        # rank = posición del primer bit 1 en los (64 - p) bits restantes
+        bits = 64 - self.p
+        with np.errstate(divide="ignore"):
+            msb = np.floor(np.log2(w.astype(np.float64)))
+        rank = np.where(w == 0, bits + 1, bits - msb).astype(np.uint8)
+        np.maximum.at(self.registers, idx, rank)
+
+    def merge(self, other: "HyperLogLog") -> None:
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def count(self) -> float:
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        est = alpha * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if est <= 2.5 * m and zeros:
+            est = m * np.log(m / zeros)
+        return float(est)
+
+
+class ReservoirSample:
+    """Uniform sample of ``size`` rows over a stream of DataFrame chunks."""
+
+    def __init__(self, size: int = 200_000, seed: int = 42) -> None:
+        self.size = size
+        self.rng = np.random.default_rng(seed)
+        self.seen = 0
+        self.sample: Optional[pd.DataFrame] = None
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        n = len(chunk)
+        if n == 0:
+            return
+        chunk = chunk.reset_index(drop=True)
+
+        # Llenado inicial
+        fill = 0
+        if self.sample is None or len(self.sample) < self.size:
+            fill = min(self.size - (0 if self.sample is None else len(self.sample)), n)
+            head = chunk.iloc[:fill]
+            self.sample = head.copy() if self.sample is None else pd.concat(
+                [self.sample, head], ignore_index=True
+            )
+
+        rest = n - fill
+        if rest > 0:
+            # Algoritmo R vectorizado: la fila global i reemplaza el slot j ~ U[0, i]
+            # si j < size; ante slots repetidos gana la última fila (como en serie).
+            pos = self.seen + fill + np.arange(rest)
+            slots = (self.rng.random(rest) * (pos + 1)).astype(np.int64)
+            accept = slots < self.size
+            rows = np.flatnonzero(accept) + fill
+            slots = slots[accept]
+            _, last = np.unique(slots[::-1], return_index=True)
+            keep = len(slots) - 1 - last
+            take = np.arange(len(self.sample))
+            take[slots[keep]] = len(self.sample) + np.arange(len(keep))
+            combined = pd.concat([self.sample, chunk.iloc[rows[keep]]], ignore_index=True)
+            self.sample = combined.take(take).reset_index(drop=True)
+
+        self.seen += n
+
+
+class FrameProfiler:
+    """Streaming profiler; feed chunks with ``update`` and call ``result``."""
+
+    def __init__(
+        self,
+        sample_size: int = 200_000,
+        hll_precision: int = 14,
+        n_workers: Optional[int] = None,
+        seed: int = 42,
+    ) -> None:
+        self.n_rows = 0
+        self.null_counts: Dict[str, int] = {}
+        self.hll: Dict[str, HyperLogLog] = {}
+        self.reputation_counts = pd.Series(dtype="int64")
+        self.maxima: Dict[str, float] = {}
+        self.reservoir = ReservoirSample(sample_size, seed)
+        self.hll_precision = hll_precision
+        self.n_workers = n_workers
+
+    def _profile_column(self, chunk: pd.DataFrame, col: str) -> None:
+        series = chunk[col]
+        if col in DISTINCT_COLS:
+            # factorize marca los nulos con -1: sirve para ambos conteos
+            codes, uniques = pd.factorize(series)
+            self.null_counts[col] += int(np.count_nonzero(codes < 0))
+            self.hll[col].update_codes(codes[codes >= 0], uniques)
+        else:
+            self.null_counts[col] += int(series.isna().sum())
+        if col in TAIL_COLS:
+            current = series.max()
+            if pd.notna(current):
+                self.maxima[col] = max(self.maxima.get(col, -np.inf), float(current))
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        for col in chunk.columns:
+            self.null_counts.setdefault(col, 0)
+            if col in DISTINCT_COLS:
+                self.hll.setdefault(col, HyperLogLog(self.hll_precision))
+
+        # Cada columna escribe solo sus propias claves: seguro entre hilos
+        with ThreadPoolExecutor(max_workers=self.n_workers) as pool:
+            list(pool.map(lambda c: self._profile_column(chunk, c), chunk.columns))
+
+        if "seller_reputation" in chunk.columns:
+            counts = chunk["seller_reputation"].value_counts(dropna=False)
+            counts.index = counts.index.fillna("<null>")
+            self.reputation_counts = self.reputation_counts.add(counts, fill_value=0)
+
+        # El sample solo guarda las columnas que se usan para cuantiles/top-k
+        sample_cols = [c for c in chunk.columns if c in TAIL_COLS or c == "category_id"]
+        self.reservoir.update(chunk[sample_cols])
+        self.n_rows += len(chunk)
+
+    def result(self) -> Dict[str, pd.DataFrame]:
+        sample = self.reservoir.sample if self.reservoir.sample is not None else pd.DataFrame()
+
+        nulls = pd.DataFrame(
+            {
+                "column": list(self.null_counts),
+                "null_count": list(self.null_counts.values()),
+            }
+        )
+        nulls["null_rate"] = nulls["null_count"] / max(self.n_rows, 1)
+
+        tails = []
+        for col in TAIL_COLS:
+            if col not in sample.columns:
+                continue
+            values = pd.to_numeric(sample[col], errors="coerce").dropna()
+            if values.empty:
+                continue
+            row = {"column": col, "n_sample": len(values)}
+            row.update({f"p{q * 100:g}": values.quantile(q) for q in TAIL_QUANTILES})
+            row["max"] = self.maxima.get(col, values.max())
+            row["share_le_0"] = float((values <= 0).mean())
+            tails.append(row)
+
+        reputation = self.reputation_counts.sort_values(ascending=False).rename("count")
+        reputation = reputation.rename_axis("seller_reputation").reset_index()
+        reputation["share"] = reputation["count"] / max(self.n_rows, 1)
+
+        distinct = pd.DataFrame(
+            {
+                "column": list(self.hll),
+                "approx_distinct": [round(h.count()) for h in self.hll.values()],
+            }
+        )
+
+        top_categories = pd.DataFrame()
+        if "category_id" in sample.columns and len(sample):
+            top_categories = (
+                sample["category_id"].value_counts(normalize=True).head(15)
+                .rename("share_sample").rename_axis("category_id").reset_index()
+            )
+
+        overview = pd.DataFrame(
+            {
+                "metric": ["rows", "columns", "sample_rows"],
+                "value": [self.n_rows, len(self.null_counts), len(sample)],
+            }
+        )
+
+        return {
+            "overview": overview,
+            "null_rates": nulls,
+            "tails": pd.DataFrame(tails),
+            "reputation_mix": reputation,
+            "distinct_counts": distinct,
+            "top_categories": top_categories,
+        }
+
+
+def _chunks(df: pd.DataFrame, chunk_size: int) -> Iterable[pd.DataFrame]:
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start : start + chunk_size]
+
+
+def profile_frame(
+    data,
+    sample_size: int = 200_000,
+    chunk_size: int = 1_000_000,
+    n_workers: Optional[int] = None,
+) -> Dict[str, pd.DataFrame]:
+    """
+    Profile a DataFrame, or any iterable of chunks (e.g.
+    ``pd.read_csv(path, chunksize=...)``) without loading it whole.
+    """
+
+    profiler = FrameProfiler(sample_size=sample_size, n_workers=n_workers)
+    chunks = _chunks(data, chunk_size) if isinstance(data, pd.DataFrame) else data
+    for chunk in chunks:
+        profiler.update(chunk)
+    return profiler.result()
+
+
+def render_html(sections: Dict[str, Dict[str, pd.DataFrame]], title: str = "Profiling report") -> str:
+    parts = [
+        "<html><head><meta charset='utf-8'>",
+        f"<title>{html.escape(title)}</title>",
+        "<style>body{font-family:sans-serif;margin:2em}"
+        "table{border-collapse:collapse;margin-bottom:1.5em}"
+        "td,th{border:1px solid #ccc;padding:4px 8px;text-align:right}</style>",
+        f"</head><body><h1>{html.escape(title)}</h1>",
+    ]
+    for dataset, tables in sections.items():
+        parts.append(f"<h2>{html.escape(dataset)}</h2>")
+        for name, table in tables.items():
+            if table.empty:
+                continue
+            parts.append(f"<h3>{html.escape(name)}</h3>")
+            parts.append(table.to_html(index=False, float_format=lambda v: f"{v:,.4g}"))
+    parts.append("</body></html>")
+    return "\n".join(parts)
+
+
+def build_profile_report(
+    frames: Dict[str, object],
+    filename: str = "profile_report.html",
+    sample_size: int = 200_000,
+    n_workers: Optional[int] = None,
+) -> Path:
+    """
+    Profile each named frame (e.g. ``{"raw": df_raw, "curated": df_clean}``)
+    and write a single HTML report into ``data/outputs``.
+    """
+
+    sections = {
+        name: profile_frame(data, sample_size=sample_size, n_workers=n_workers)
+        for name, data in frames.items()
+    }
+    OUTPUTS_DIR.mkdir(parents=True, exist_ok=True)
+    path = OUTPUTS_DIR / filename
+    path.write_text(render_html(sections), encoding="utf-8")
+    return path
+
+
+def _raw_partition_chunks(
+    patterns: Sequence[str],
+    start_day: Optional[str] = None,
+    end_day: Optional[str] = None,
+    base_dir: Path = RAW_DATA_DIR,
+) -> Iterable[pd.DataFrame]:
+    """One chunk per partition file, pruned and filtered like ``load_raw_partitions``."""
+
+    files = prune_partitions(discover_raw_files(patterns, base_dir), start_day, end_day, base_dir)
+    if not files:
+        raise FileNotFoundError(
+            f"No raw partitions in [{start_day}, {end_day}] for {list(patterns)} under {base_dir}"
+        )
+    for path in files:
+        yield read_raw_file(path, start_day, end_day, base_dir)
+
+
+def run_profile_report(
+    raw_filename: str = "df_challenge_meli.csv",
+    curated_filename: str = "df_curated.csv",
+    chunk_size: int = 1_000_000,
+    n_workers: Optional[int] = None,
+    raw_patterns: Optional[Sequence[str]] = None,
+    start_day: Optional[str] = None,
+    end_day: Optional[str] = None,
+) -> Path:
+    """
+    Convenience wrapper: stream the raw and curated CSVs into the report.
+
+    With ``raw_patterns`` the raw section profiles the same partitioned
+    exports (and ``tim_day`` range) the pipeline read, one file at a time,
+    instead of the single challenge CSV.
+    """
+
+    frames = {}
+    if raw_patterns:
+        frames["raw"] = _raw_partition_chunks(raw_patterns, start_day, end_day)
+    else:
+        raw_path = RAW_DATA_DIR / raw_filename
+        if not raw_path.exists():
+            raise FileNotFoundError(f"Dataset not found at {raw_path}")
+        frames["raw"] = pd.read_csv(raw_path, chunksize=chunk_size, dtype=RAW_SCHEMA)
+
+    curated_path = PROCESSED_DIR / curated_filename
+    if not curated_path.exists():
+        raise FileNotFoundError(f"Dataset not found at {curated_path}")
+    # Mismos dtypes que load_curated_dataset: nicknames hex todo-dígitos no pasan a int
+    frames["curated"] = pd.read_csv(
+        curated_path,
+        chunksize=chunk_size,
+        dtype={"seller_nickname": str, "category_id": str},
+    )
+    return build_profile_report(frames, n_workers=n_workers)
@@ -4,11 +4,22 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, Sequence, Tuple
+from typing import Iterable, Optional, Sequence, Tuple
 
 import numpy as np
 import pandas as pd
 
+from .dedup import add_unique_products
+from .dynamics import add_seller_dynamics
+from .keys import (
+    KEY_COL,
+    NULL_KEY,
+    SellerKeyEncoder,
+    decode_seller_keys,
+    encode_seller_keys,
+    mode_by_key,
+)
+
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
 PROCESSED_DIR = PROJECT_ROOT / "data" / "processed"
 
@@ -19,13 +30,44 @@ def load_curated_dataset(filename: str = "df_curated.csv") -> pd.DataFrame:
     path = PROCESSED_DIR / filename
     if not path.exists():
         raise FileNotFoundError(f"Curated dataset not found at {path}")
-    return pd.read_csv(path)
+    return pd.read_csv(path, dtype={"seller_nickname": str, "category_id": str})
 
 
-import pandas as pd
+def add_item_price_index(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Añade features de precio relativo a nivel ítem:
 
+        - category_median_price: mediana de `price` en su `category_id`
+        - price_index: price / category_median_price
+        - category_price_pct: percentil (0-1] de `price` dentro de `category_id`
+        - discount_depth: 1 - price / regular_price (0 si no hay descuento)
+        - is_discounted: price < regular_price
 
-def build_seller_table(df: pd.DataFrame) -> pd.DataFrame:
+    Todo se calcula con groupby-transform/rank vectorizados (una pasada por
+    categoría, sin `apply`). Si no existe `regular_price`, no hay descuentos.
+    """
+    out = df.copy()
+
+    by_cat = out.groupby("category_id")["price"]
+    out["category_median_price"] = by_cat.transform("median")
+    out["price_index"] = out["price"] / out["category_median_price"].where(
+        out["category_median_price"] > 0
+    )
+    out["category_price_pct"] = by_cat.rank(method="average", pct=True)
+
+    if "regular_price" in out.columns:
+        regular = out["regular_price"]
+    else:
+        regular = pd.Series(np.nan, index=out.index)
+    out["is_discounted"] = (regular > out["price"]) & (regular > 0)
+    out["discount_depth"] = (1 - out["price"] / regular).where(out["is_discounted"], 0.0)
+
+    return out
+
+
+def build_seller_table(
+    df: pd.DataFrame, encoder: Optional[SellerKeyEncoder] = None
+) -> pd.DataFrame:
     """
     Construye una tabla agregada a nivel seller (`seller_table`) a partir del
     DataFrame de ítems.
@@ -39,85 +81,88 @@ def build_seller_table(df: pd.DataFrame) -> pd.DataFrame:
     - category_id
     - condition
     - seller_reputation
+    - regular_price (opcional, para la profundidad de descuento)
+
+    Todas las agregaciones se hacen sobre `seller_key` (int64, ver `keys`);
+    `seller_nickname` se reconstruye al final a partir de la key. Si `df` ya
+    trae `seller_key`, debe pasarse el `encoder` con el que se generó.
     """
 
-    df = df.copy()
+    if KEY_COL in df.columns and encoder is not None:
+        df = df.copy()
+    else:
+        df, encoder = encode_seller_keys(df, encoder)
+
+    # Ítems sin seller_nickname no pertenecen a ningún seller (como el NaN
+    # en un groupby por nickname): se excluyen de la agregación.
+    has_seller = (df[KEY_COL] != NULL_KEY).to_numpy()
+    if not has_seller.all():
+        df = df[has_seller]
 
     # Valor por ítem para evitar depender del df externo en el groupby
     df["item_value"] = df["price"] * df["stock_norm"]
+    by_seller = df.groupby(KEY_COL, sort=True)
 
     # 1. Tamaño e intensidad
-    seller_metrics = (
-        df.groupby("seller_nickname")
-        .agg(
-            n_items=("titulo", "count"),
-            total_stock=("stock_norm", "sum"),
-            logistic_type=("logistic_type", "first"),
-            total_value=("item_value", "sum"),
-        )
-        .reset_index()
+    seller_metrics = by_seller.agg(
+        n_items=("titulo", "count"),
+        total_stock=("stock_norm", "sum"),
+        logistic_type=("logistic_type", "first"),
+        total_value=("item_value", "sum"),
+    )
+
+    # 6. Stock por ítem (sobre la tabla agregada)
+    seller_metrics["avg_stock_per_item"] = (
+        seller_metrics["total_stock"] / seller_metrics["n_items"]
     )
 
     # 2. Diversificación vs especialización
-    category_agg = (
-        df.groupby("seller_nickname")
-        .agg(
-            n_categories=("category_id", pd.Series.nunique),
-        )
+    category_agg = by_seller.agg(n_categories=("category_id", "nunique"))
+
+    # Categoría principal: mayor conteo por seller. Empates -> la categoría
+    # que aparece primero en el seller: desempate determinístico elegido a
+    # propósito; difiere del orden arbitrario de `value_counts().idxmax()`
+    # de la versión anterior, así que algunos sellers empatados cambian de
+    # main_category.
+    cat_counts = (
+        df.assign(_pos=np.arange(len(df)))
+        .groupby([KEY_COL, "category_id"], sort=False)
+        .agg(n=("_pos", "size"), first_pos=("_pos", "min"))
         .reset_index()
     )
-
-    def main_cat(gr: pd.DataFrame) -> pd.Series:
-        most_common = gr["category_id"].value_counts().idxmax()
-        pct_main = gr["category_id"].value_counts(normalize=True).max()
-        return pd.Series(
-            {
-                "main_category": most_common,
-                "pct_main_category": pct_main,
-            }
-        )
-
+    cat_total = cat_counts.groupby(KEY_COL)["n"].transform("sum")
+    cat_counts["pct"] = cat_counts["n"] / cat_total
     diversity = (
-        df.groupby("seller_nickname")
-        .apply(main_cat)
-        .reset_index()
+        cat_counts.sort_values([KEY_COL, "n", "first_pos"], ascending=[True, False, True])
+        .drop_duplicates(KEY_COL)
+        .set_index(KEY_COL)[["category_id", "pct"]]
+        .rename(columns={"category_id": "main_category", "pct": "pct_main_category"})
     )
 
     # 3. Estructura de condición (nuevo/usado/refurb)
-    def cond_pct(gr: pd.DataFrame) -> pd.Series:
-        n = len(gr)
-        pct_new = (gr["condition"] == "new").sum() / n
-        pct_used = (gr["condition"] == "used").sum() / n
-        pct_refurb = (gr["condition"] == "refurbished").sum() / n
-        return pd.Series(
-            {
-                "pct_new": pct_new,
-                "pct_used": pct_used,
-                "pct_refurbished": pct_refurb,
-            }
-        )
-
     cond = (
-        df.groupby("seller_nickname")
-        .apply(cond_pct)
-        .reset_index()
-    )
-
-    # 4. Posicionamiento de precios
-    def price_stats(gr: pd.DataFrame) -> pd.Series:
-        avg_price = gr["price"].mean()
-        median_price = gr["price"].median()
-        return pd.Series(
+        pd.DataFrame(
             {
-                "avg_price_regular": avg_price,
-                "median_price_regular": median_price,
+                KEY_COL: df[KEY_COL],
+                "pct_new": df["condition"] == "new",
+                "pct_used": df["condition"] == "used",
+                "pct_refurbished": df["condition"] == "refurbished",
             }
         )
+        .groupby(KEY_COL, sort=True)
+        .mean()
+    )
 
-    prices = (
-        df.groupby("seller_nickname")
-        .apply(price_stats)
-        .reset_index()
+    # 4. Posicionamiento de precios (propio y relativo a la categoría)
+    df = add_item_price_index(df)
+    prices = df.groupby(KEY_COL, sort=True).agg(
+        avg_price_regular=("price", "mean"),
+        median_price_regular=("price", "median"),
+        avg_price_index=("price_index", "mean"),
+        median_price_index=("price_index", "median"),
+        avg_category_price_pct=("category_price_pct", "mean"),
+        avg_discount_depth=("discount_depth", "mean"),
+        pct_discounted=("is_discounted", "mean"),
     )
 
     # 5. Reputación
@@ -134,38 +179,34 @@ def build_seller_table(df: pd.DataFrame) -> pd.DataFrame:
         "unknown": 0,
     }
 
-    def rep_score(gr: pd.DataFrame) -> pd.Series:
-        rep = gr["seller_reputation"].mode()[0]
-        score = reputation_map.get(rep, 0)
-        return pd.Series(
-            {
-                "seller_reputation": rep,
-                "seller_reputation_score": score,
-            }
-        )
-
-    reputation = (
-        df.groupby("seller_nickname")
-        .apply(rep_score)
-        .reset_index()
+    known_rep = df["seller_reputation"].notna().to_numpy()
+    rep = mode_by_key(
+        df[KEY_COL].to_numpy()[known_rep], df["seller_reputation"].to_numpy()[known_rep]
     )
-
-    # 6. Stock por ítem (sobre la tabla agregada)
-    seller_metrics["avg_stock_per_item"] = (
-        seller_metrics["total_stock"] / seller_metrics["n_items"]
+    reputation = pd.DataFrame(
+        {
+            "seller_reputation": rep,
+            "seller_reputation_score": rep.map(reputation_map).fillna(0).astype(int),
+        }
     )
 
-    # Merge de todas las métricas
-    seller_table = (
-        seller_metrics.merge(category_agg, on="seller_nickname")
-        .merge(diversity, on="seller_nickname")
-        .merge(cond, on="seller_nickname")
-        .merge(prices, on="seller_nickname")
-        .merge(reputation, on="seller_nickname")
+    # Todas las métricas comparten el índice seller_key: se alinean por
+    # índice entero en lugar de encadenar merges por nickname. Alineación
+    # sobre todos los sellers de seller_metrics: un seller sin reputación
+    # conocida (mode_by_key ignora NaN) no desaparece, queda "unknown".
+    seller_table = pd.concat(
+        [seller_metrics, category_agg, diversity, cond, prices, reputation],
+        axis=1,
+        join="outer",
+    ).reindex(seller_metrics.index)
+    seller_table["seller_reputation"] = seller_table["seller_reputation"].fillna("unknown")
+    seller_table["seller_reputation_score"] = (
+        seller_table["seller_reputation_score"].fillna(reputation_map["unknown"]).astype(int)
     )
+    seller_table.index.name = KEY_COL
+    seller_table = seller_table.reset_index()
 
-    return seller_table
-
+    return decode_seller_keys(seller_table, encoder)
 
 
 def add_seller_size(
@@ -203,10 +244,11 @@ def add_seller_size(
     out["seller_size"] = values.apply(_seller_size)
     return out
 
-def add_diversification(df: pd.DataFrame) -> pd.DataFrame:
+def add_diversification(df: pd.DataFrame, items_col: str = "n_items") -> pd.DataFrame:
     """
     Añade la columna `clasificacion_diversificacion` al DataFrame a nivel seller,
-    usando las reglas:
+    usando las reglas (n_items = `items_col`, p.ej. `n_unique_products` para
+    no contar publicaciones duplicadas):
 
         if n_cat == 1 and n_items == 1      -> "Superficial"
         elif n_cat == 1 and n_items > 1    -> "Especialista"
@@ -228,12 +270,12 @@ def add_diversification(df: pd.DataFrame) -> pd.DataFrame:
     else:
         raise ValueError("Se requiere una columna 'n_categories' o 'n_categorias'.")
 
-    if "n_items" not in out.columns:
-        raise ValueError("Se requiere la columna 'n_items'.")
+    if items_col not in out.columns:
+        raise ValueError(f"Se requiere la columna '{items_col}'.")
 
     def _clasificacion_diversificacion(row: pd.Series) -> str:
         n_cat = row[n_cat_col]
-        n_items = row["n_items"]
+        n_items = row[items_col]
 
         if n_cat == 1 and n_items == 1:
             return "Superficial"
@@ -294,14 +336,54 @@ def add_quality(df: pd.DataFrame) -> pd.DataFrame:
     return out
 
 
-def run_full_segmentation() -> pd.DataFrame:
-    """Convenience wrapper used by scripts/notebooks."""
+def add_price_positioning(
+    df: pd.DataFrame,
+    low: float = 0.8,
+    high: float = 1.2,
+) -> pd.DataFrame:
+    """
+    Añade la columna `clasificacion_precio` a nivel seller según
+    `median_price_index` (precio relativo a la mediana de su categoría):
+
+        median_price_index >= high -> "premium"
+        median_price_index <= low  -> "economico"
+        resto                      -> "alineado"
+    """
+    out = df.copy()
+
+    if "median_price_index" not in out.columns:
+        raise ValueError("Se requiere la columna 'median_price_index'.")
+
+    idx = out["median_price_index"]
+    out["clasificacion_precio"] = np.select(
+        [idx >= high, idx <= low],
+        ["premium", "economico"],
+        default="alineado",
+    )
+    return out
+
+
+def run_full_segmentation(dedup_titles: bool = False) -> pd.DataFrame:
+    """
+    Convenience wrapper used by scripts/notebooks.
+
+    With ``dedup_titles`` near-duplicate listings (``dedup`` module) are
+    grouped into products: adds `n_unique_products` and
+    `duplicate_listing_rate`, and the diversification rules use
+    `n_unique_products` instead of `n_items`.
+    """
 
-    df_raw = load_curated_dataset()
-    df_raw = build_seller_table(df_raw)
+    df_items, encoder = encode_seller_keys(load_curated_dataset())
+    df_raw = build_seller_table(df_items, encoder)
+    df_raw = add_seller_dynamics(df_raw, df_items)
     df_raw = add_seller_size(df_raw)
-    df_raw = add_diversification(df_raw)
+    if dedup_titles:
+        df_raw = add_unique_products(df_raw, df_items)
+        df_raw = add_diversification(df_raw, items_col="n_unique_products")
+    else:
+        df_raw = add_diversification(df_raw)
     df_raw = add_quality(df_raw)
+    df_raw = add_price_positioning(df_raw)
     # df_raw = add_axis_scores(df_raw)
     # print(df_raw.columns)
     # print(df_raw.head())